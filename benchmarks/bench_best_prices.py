@@ -0,0 +1,97 @@
+"""Сравнение построчного и векторного расчета лучших цен.
+
+Показывает, с какого размера выборки векторный путь становится быстрее,
+и проверяет, что оба пути дают одинаковый результат. Для списка записей
+от парсера основное время уходит на сборку all_options, поэтому выигрыш
+векторного пути проявляется на столбцовых данных (DataFrame).
+
+Запуск из корня проекта:
+    python benchmarks/bench_best_prices.py [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.price_analytics import find_best_prices_python, find_best_prices_vectorized
+
+# (материалов, поставщиков)
+GRID_SIZES = [(10, 5), (20, 10), (50, 10), (200, 10), (500, 20), (1000, 30), (3000, 40)]
+
+
+def make_prices(materials_count, suppliers_count, seed=42):
+    """Синтетическая выборка: каждый материал у каждого поставщика"""
+    rng = random.Random(seed)
+    prices_data = []
+    for supplier in range(suppliers_count):
+        for material in range(materials_count):
+            base_price = 100 + material * 7
+            prices_data.append({
+                'material': f"материал {material}",
+                'supplier': f"поставщик {supplier}",
+                # Округление до рублей дает одинаковые цены и проверяет выбор при равенстве
+                'price': float(round(base_price * rng.uniform(0.9, 1.1))),
+                'product_name': f"товар {material}",
+                'url': f"https://example.com/{supplier}/{material}",
+            })
+    return prices_data
+
+
+def measure(func, prices, repeat):
+    """Лучшее время из repeat запусков, мс"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(prices)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def find_best_prices_from_frame(frame):
+    """Построчный путь для столбцовых данных: сначала нужно развернуть их в записи"""
+    return find_best_prices_python(frame.to_dict('records'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("Время в мс. Список - записи от парсера, DataFrame - срез из хранилища/архива.\n")
+    print(f"{'строк':>8} {'список: построчно':>18} {'список: векторно':>17} "
+          f"{'DataFrame: построчно':>21} {'DataFrame: векторно':>20}")
+
+    crossover = None
+    for materials_count, suppliers_count in GRID_SIZES:
+        prices_data = make_prices(materials_count, suppliers_count)
+        frame = pd.DataFrame(prices_data)
+
+        timings = [
+            measure(find_best_prices_python, prices_data, args.repeat),
+            measure(find_best_prices_vectorized, prices_data, args.repeat),
+            measure(find_best_prices_from_frame, frame, args.repeat),
+            measure(find_best_prices_vectorized, frame, args.repeat),
+        ]
+        expected = find_best_prices_python(prices_data)
+        same = expected == find_best_prices_vectorized(prices_data) == find_best_prices_vectorized(frame)
+
+        if crossover is None and timings[3] < timings[2]:
+            crossover = len(prices_data)
+        mark = "" if same else "  ⚠️ результаты отличаются"
+        print(f"{len(prices_data):>8} {timings[0]:>18.2f} {timings[1]:>17.2f} "
+              f"{timings[2]:>21.2f} {timings[3]:>20.2f}{mark}")
+
+    if crossover:
+        print(f"\nДля DataFrame векторный путь быстрее начиная примерно с {crossover} строк "
+              f"(analytics.vectorize_min_rows в config.yaml)")
+    else:
+        print("\nНа проверенных размерах построчный путь быстрее")
+
+
+if __name__ == "__main__":
+    main()
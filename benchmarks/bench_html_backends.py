@@ -0,0 +1,104 @@
+"""Сравнение HTML-бэкендов парсера на сохраненных страницах поиска.
+
+Запуск из корня проекта:
+    python benchmarks/bench_html_backends.py [--repeat 20]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+import yaml
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.html_extractor import HtmlExtractor, SoupBackend, SelectolaxBackend, HTMLParser, LXML_AVAILABLE
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# Сохраненная страница -> магазин из config.yaml, чьи селекторы к ней подходят
+FIXTURES = {
+    'petrovich_search.html': 'Петрович',
+    'leroymerlin_search.html': 'Леруа Мерлен',
+}
+
+QUERY = "арматура 12мм"
+
+
+def legacy_parse(extractor, html, supplier_name, query):
+    """Прежний путь: полное дерево html.parser и разбор селекторов на каждой карточке"""
+    supplier_config = extractor.config['scout']['suppliers'][supplier_name]
+    selectors = supplier_config['selectors']
+    soup = BeautifulSoup(html, 'html.parser')
+    products = []
+    limit = extractor.config['scout']['parser_settings']['max_products_per_search']
+    for card in soup.select(selectors['product_card'])[:limit]:
+        title = card.select_one(selectors['product_title'])
+        if not title:
+            continue
+        price_text = ""
+        for selector in [selectors['product_price'], 'span.price', 'div.price', 'meta[itemprop="price"]',
+                         'span[class*="price"]', 'div[class*="price"]']:
+            element = card.select_one(selector)
+            if element:
+                price_text = element.get('content') or element.get_text(strip=True)
+                if price_text:
+                    break
+        price = extractor.clean_price(price_text)
+        if price and extractor.is_relevant_product(title.get_text(strip=True), query):
+            products.append((title.get_text(strip=True), price))
+    return products
+
+
+def measure(func, repeat):
+    """Лучшее время из repeat запусков, мс"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--config', default='config/config.yaml')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    # Разбираем все карточки, чтобы нагрузка была заметной
+    config = copy.deepcopy(config)
+    config['scout']['parser_settings']['max_products_per_search'] = 1000
+
+    backends = [SoupBackend('html.parser')]
+    if LXML_AVAILABLE:
+        backends.append(SoupBackend('lxml'))
+    if HTMLParser is not None:
+        backends.append(SelectolaxBackend())
+
+    for file_name, supplier_name in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, file_name), 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        print(f"\n📄 {file_name} ({len(html) // 1024} КБ, селекторы '{supplier_name}')")
+
+        extractor = HtmlExtractor(config, SoupBackend('html.parser'))
+        expected = legacy_parse(extractor, html, supplier_name, QUERY)
+        baseline = measure(lambda: legacy_parse(extractor, html, supplier_name, QUERY), args.repeat)
+        print(f"   {'прежний html.parser':<22} {baseline:8.2f} мс  x1.00  ({len(expected)} товаров)")
+
+        for backend in backends:
+            extractor = HtmlExtractor(config, backend)
+            run = lambda: extractor.parse_real_search_results(html, supplier_name, QUERY)
+            found = [(p['name'], p['price']) for p in run()]
+            elapsed = measure(run, args.repeat)
+            status = "" if found == expected else "  ⚠️ результаты отличаются"
+            print(f"   {backend.name:<22} {elapsed:8.2f} мс  x{baseline / elapsed:.2f}  ({len(found)} товаров){status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -90,8 +91,7 @@ def main():
                 print("=" * 55)
                 
                 try:
-                    # Пробуем загрузить последний отчет
-                    prices_df = scout.price_monitor.get_all_prices(use_parser=False)
+                    # Последний срез цен из хранилища (без повторного сбора)
                     best_prices = scout.price_monitor.find_best_prices()
                     
                     if best_prices:
@@ -139,24 +139,22 @@ def main():
                         material_choice = input("\n🎯 Выберите номер товара: ").strip()
                         if material_choice.isdigit() and 1 <= int(material_choice) <= len(materials):
                             selected_material = materials[int(material_choice) - 1]
-                            history = scout.price_monitor.get_price_history(selected_material, days=30)
+                            # Готовая скользящая статистика по поставщикам (без обхода истории)
+                            summary = scout.price_monitor.get_price_summary(selected_material, days=30)
                             
-                            if not history.empty:
+                            if summary:
                                 print(f"\n📈 История цен на '{selected_material}' (30 дней):")
                                 print("-" * 55)
                                 
-                                # Группируем по поставщикам
-                                suppliers = history['supplier'].unique()
-                                for supplier in suppliers:
-                                    supplier_data = history[history['supplier'] == supplier]
-                                    min_price = supplier_data['price'].min()
-                                    max_price = supplier_data['price'].max()
-                                    last_price = supplier_data.iloc[-1]['price']
-                                    print(f"\n🏪 {supplier}:")
-                                    print(f"   📊 Мин: {min_price} руб.")
-                                    print(f"   📊 Макс: {max_price} руб.") 
-                                    print(f"   📊 Текущая: {last_price} руб.")
-                                    print(f"   📅 Записей: {len(supplier_data)}")
+                                for supplier_stats in summary:
+                                    print(f"\n🏪 {supplier_stats['supplier']}:")
+                                    print(f"   📊 Мин: {supplier_stats['min_price']} руб.")
+                                    print(f"   📊 Макс: {supplier_stats['max_price']} руб.") 
+                                    print(f"   📊 Текущая: {supplier_stats['last_price']} руб.")
+                                    if 'mean_price' in supplier_stats:
+                                        print(f"   📊 Средняя: {supplier_stats['mean_price']} руб.")
+                                        print(f"   📈 Изменение: {supplier_stats['pct_change']:+.2f}%")
+                                    print(f"   📅 Записей: {supplier_stats['count']}")
                             else:
                                 print(f"\n❌ Нет исторических данных для '{selected_material}'")
                         else:
@@ -178,9 +176,14 @@ def main():
                 
                 suppliers = scout.get_available_suppliers()
                 if suppliers:
-                    print(f"\n📋 Доступные поставщики:")
+                    print(f"\n📋 Рейтинг поставщиков:")
+                    ranking = {item['supplier_name']: item for item in scout.get_suppliers_ranking()}
                     for i, supplier in enumerate(suppliers, 1):
-                        print(f"   {i}. {supplier}")
+                        item = ranking.get(supplier)
+                        if item and item['reliability_score'] is not None:
+                            print(f"   {i}. {supplier} - {item['reliability_score']}/100 (место {item['rank']})")
+                        else:
+                            print(f"   {i}. {supplier} - нет данных")
                     
                     try:
                         supplier_choice = input("\n🎯 Выберите номер поставщика: ").strip()
@@ -191,19 +194,30 @@ def main():
                             if result:
                                 print(f"\n🔍 АНАЛИЗ ПОСТАВЩИКА: {selected_supplier}")
                                 print("-" * 55)
-                                print(f"   📊 Рейтинг надежности: {result['reliability_score']}/100")
+                                if result['reliability_score'] is not None:
+                                    print(f"   📊 Рейтинг надежности: {result['reliability_score']}/100 (место {result['rank']})")
                                 print(f"   🏷️ Статус: {result['status']}")
                                 print(f"   📦 Товаров в базе: {result['materials_count']}")
+                                if result['success_rate'] is not None:
+                                    print(f"   📡 Успешных запросов: {result['success_rate']:.0%}")
+                                if result['competitiveness'] is not None:
+                                    print(f"   💰 Цены к лучшим: {result['competitiveness']:.0%}")
+                                if result['stability'] is not None:
+                                    print(f"   📉 Стабильность цен: {result['stability']:.0%}")
+                                if result['age_hours'] is not None:
+                                    print(f"   🕒 Данные обновлены: {result['age_hours']} ч назад")
                                 print(f"   💡 Рекомендация: {result['recommendation']}")
                                 print(f"   🌐 Сайт: {result['url']}")
                                 
-                                # Показываем товары этого поставщика
-                                prices_df = scout.price_monitor.get_all_prices(use_parser=False)
-                                supplier_prices = prices_df[prices_df['supplier'] == selected_supplier]
-                                if not supplier_prices.empty:
+                                # Показываем последние цены этого поставщика из хранилища
+                                supplier_prices = [
+                                    item for item in scout.price_monitor.get_latest_snapshot()
+                                    if item['supplier'] == selected_supplier
+                                ]
+                                if supplier_prices:
                                     print(f"\n📦 Товары поставщика:")
-                                    for _, row in supplier_prices.iterrows():
-                                        print(f"   • {row['material']}: {row['price']} руб.")
+                                    for item in supplier_prices:
+                                        print(f"   • {item['material']}: {item['price']} руб.")
                             else:
                                 print(f"❌ Не удалось проанализировать поставщика {selected_supplier}")
                         else:
@@ -279,4 +293,6 @@ def main():
         input("Нажмите Enter для выхода...")
 
 if __name__ == "__main__":
+    # В собранном exe процессы разбора (parse_workers) запускают этот же файл
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
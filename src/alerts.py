@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from datetime import datetime
+import requests
+
+
+class JsonlSink:
+    """Запись уведомлений в файл, по одному JSON на строку"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def send(self, alerts):
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """Отправка уведомлений POST-запросом на локальный обработчик (заглушка вебхука)"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        try:
+            response = requests.post(self.url, json={'alerts': alerts}, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            # Уведомления уже записаны в файл, сбой вебхука не мешает сбору цен
+            print(f"⚠️  Вебхук уведомлений недоступен: {e}")
+
+
+class AlertEngine:
+    """Правила уведомлений о ценах, проверяемые на каждой новой пачке цен
+
+    Состояние пар (сумма и число цен за окно, последняя цена) берется из
+    готовых агрегатов хранилища один раз на материал и дальше обновляется
+    по каждой пачке, поэтому проверка не обходит историю. Пачка проверяется
+    до записи в хранилище: новые цены сравниваются с тем, что было до них.
+
+    Уведомление срабатывает, когда условие становится истинным: цена, которая
+    уже была ниже порога или выше бюджета, повторно не сообщается.
+    """
+
+    def __init__(self, config, store):
+        settings = config['scout'].get('alerts', {})
+        rules = settings.get('rules', {})
+        self.store = store
+        self.enabled = settings.get('enabled', False)
+
+        self.price_drop = rules.get('price_drop', {})
+        self.window_days = self.price_drop.get('window_days', 30)
+        if self.window_days not in store.rolling_windows:
+            print(f"⚠️  Окна {self.window_days} дней нет в storage.rolling_windows, используется 30")
+            self.window_days = 30 if 30 in store.rolling_windows else max(store.rolling_windows)
+        self.new_best = rules.get('new_best_supplier', {})
+        self.budget = rules.get('budget_ceiling', {})
+
+        self.sinks = []
+        if settings.get('jsonl_path'):
+            self.sinks.append(JsonlSink(settings['jsonl_path']))
+        if settings.get('webhook_url'):
+            self.sinks.append(WebhookSink(settings['webhook_url'], settings.get('webhook_timeout', 5)))
+
+        self.state_day = None
+        self.materials = {}
+        self.lock = threading.Lock()
+
+    def get_material_state(self, material):
+        """Состояние пар материала: {поставщик: {'sum', 'count', 'last'}} (загружается один раз)"""
+        today = datetime.now().date()
+        if self.state_day != today:
+            # Окно сдвинулось: состояние перечитывается из агрегатов
+            self.state_day = today
+            self.materials = {}
+
+        if material not in self.materials:
+            pairs = {}
+            for stats in self.store.get_rolling_stats(material, self.window_days):
+                pairs[stats['supplier']] = {
+                    'sum': stats['mean_price'] * stats['count'],
+                    'count': stats['count'],
+                    'last': None
+                }
+            for item in self.store.get_latest_snapshot({material}):
+                pairs.setdefault(item['supplier'], {'sum': 0.0, 'count': 0, 'last': None})['last'] = item['price']
+            self.materials[material] = pairs
+        return self.materials[material]
+
+    def evaluate(self, prices_data):
+        """Проверка пачки цен и отправка сработавших уведомлений"""
+        if not self.enabled or not prices_data:
+            return []
+
+        alerts = []
+        with self.lock:
+            by_material = {}
+            for item in prices_data:
+                by_material.setdefault(item['material'], []).append(item)
+
+            for material, items in by_material.items():
+                pairs = self.get_material_state(material)
+                best_before = self.get_best(pairs)
+
+                for item in items:
+                    pair = pairs.setdefault(item['supplier'], {'sum': 0.0, 'count': 0, 'last': None})
+                    alerts.extend(self.check_price(material, item, pair))
+                    pair['sum'] += float(item['price'])
+                    pair['count'] += 1
+                    pair['last'] = float(item['price'])
+
+                alerts.extend(self.check_best(material, best_before, self.get_best(pairs)))
+
+        if alerts:
+            for alert in alerts:
+                print(f"🔔 {alert['message']}")
+            for sink in self.sinks:
+                sink.send(alerts)
+        return alerts
+
+    def check_price(self, material, item, pair):
+        """Падение цены относительно средней за окно и превышение бюджета"""
+        alerts = []
+        price = float(item['price'])
+        previous = pair['last']
+
+        if self.price_drop.get('enabled', False) and pair['count']:
+            mean = pair['sum'] / pair['count']
+            threshold = mean * (1 - self.price_drop.get('threshold_pct', 10) / 100)
+            if price <= threshold and not (previous is not None and previous <= threshold):
+                alerts.append(self.make_alert(
+                    'price_drop', item,
+                    f"{material}: {item['supplier']} снизил цену до {price} руб. "
+                    f"({(price / mean - 1) * 100:+.1f}% к средней за {self.window_days} дн.)",
+                    mean_price=round(mean, 2)
+                ))
+
+        budgets = self.budget.get('budgets') or {}
+        if self.budget.get('enabled', False) and material in budgets:
+            ceiling = budgets[material]
+            if price > ceiling and not (previous is not None and previous > ceiling):
+                alerts.append(self.make_alert(
+                    'budget_ceiling', item,
+                    f"{material}: цена {item['supplier']} {price} руб. выше бюджета {ceiling} руб.",
+                    budget=ceiling
+                ))
+        return alerts
+
+    def get_best(self, pairs):
+        """Поставщик с самой низкой последней ценой"""
+        known = [(pair['last'], supplier) for supplier, pair in pairs.items() if pair['last'] is not None]
+        return min(known) if known else None
+
+    def check_best(self, material, best_before, best_after):
+        """Смена поставщика с лучшей ценой"""
+        if not self.new_best.get('enabled', False) or not best_before or not best_after:
+            return []
+        if best_before[1] == best_after[1]:
+            return []
+
+        price, supplier = best_after
+        item = {'material': material, 'supplier': supplier, 'price': price}
+        return [self.make_alert(
+            'new_best_supplier', item,
+            f"{material}: лучшая цена теперь у {supplier} - {price} руб. "
+            f"(было {best_before[1]} - {best_before[0]} руб.)",
+            previous_supplier=best_before[1], previous_price=best_before[0]
+        )]
+
+    def make_alert(self, rule, item, message, **details):
+        return dict({
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'rule': rule,
+            'material': item['material'],
+            'supplier': item['supplier'],
+            'price': float(item['price']),
+            'message': message
+        }, **details)
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from collections.abc import Mapping
+import yaml
+
+
+class ConfigError(ValueError):
+    """Ошибка в содержимом config.yaml"""
+
+
+class FrozenDict(Mapping):
+    """Неизменяемый словарь: общий конфиг нельзя случайно поменять из компонента"""
+
+    def __init__(self, *args, **kwargs):
+        self._data = dict(*args, **kwargs)
+        self._hash = None
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def __repr__(self):
+        return f"FrozenDict({self._data!r})"
+
+    def __reduce__(self):
+        # Конфиг передается в процессы разбора страниц (ProcessPoolExecutor)
+        return (FrozenDict, (self._data,))
+
+
+def freeze(value):
+    """Словари -> FrozenDict, списки -> кортежи (рекурсивно)"""
+    if isinstance(value, Mapping):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# Обязательные поля магазина и их типы
+SUPPLIER_FIELDS = {
+    'base_url': str,
+    'search_url': str,
+    'city': str,
+    'regions': list,
+}
+
+# Необязательные разделы scout: если заданы, должны быть словарями
+OPTIONAL_SECTIONS = ['freshness', 'crawl_priority', 'storage', 'analytics', 'news', 'supplier_scoring', 'alerts']
+
+
+def validate_config(data):
+    """Проверка структуры конфига; все найденные ошибки - в одном ConfigError"""
+    errors = []
+    scout = data.get('scout') if isinstance(data, dict) else None
+    if not isinstance(scout, dict):
+        raise ConfigError("нет раздела scout")
+
+    materials = scout.get('target_materials')
+    if not isinstance(materials, list) or not all(isinstance(item, str) and item for item in materials):
+        errors.append("scout.target_materials: нужен список названий")
+
+    suppliers = scout.get('suppliers')
+    if not isinstance(suppliers, dict):
+        errors.append("scout.suppliers: нужен словарь магазинов")
+        suppliers = {}
+    for supplier_name, supplier_config in suppliers.items():
+        if not isinstance(supplier_config, dict):
+            errors.append(f"scout.suppliers.{supplier_name}: нужен словарь настроек")
+            continue
+        for field, field_type in SUPPLIER_FIELDS.items():
+            if not isinstance(supplier_config.get(field), field_type):
+                errors.append(f"scout.suppliers.{supplier_name}.{field}: нужен {field_type.__name__}")
+        if '{query}' not in str(supplier_config.get('search_url', '{query}')):
+            errors.append(f"scout.suppliers.{supplier_name}.search_url: нет подстановки {{query}}")
+
+    if not isinstance(scout.get('parser_settings'), dict):
+        errors.append("scout.parser_settings: нужен словарь настроек парсера")
+    for section in OPTIONAL_SECTIONS:
+        if scout.get(section) is not None and not isinstance(scout[section], dict):
+            errors.append(f"scout.{section}: нужен словарь")
+    if not isinstance(scout.get('news_feeds') or [], list):
+        errors.append("scout.news_feeds: нужен список адресов")
+
+    if errors:
+        raise ConfigError('; '.join(errors))
+
+
+class SharedConfig:
+    """Конфиг из YAML, разобранный один раз и общий для всех компонентов
+
+    Файл перечитывается лениво: при обращении не чаще раза в check_interval
+    секунд проверяется время изменения, и только если оно поменялось, YAML
+    разбирается заново. Если новая версия файла с ошибкой, остается прежняя.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.data = None
+        self.mtime = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.data is None or now - self.checked >= self.check_interval:
+                self.checked = now
+                try:
+                    mtime = os.stat(self.path).st_mtime_ns
+                except OSError:
+                    # Файл временно недоступен (например, перезаписывается): остается прежний конфиг
+                    if self.data is None:
+                        raise
+                    return self.data
+                if mtime != self.mtime:
+                    self.reload(mtime)
+            return self.data
+
+    def reload(self, mtime):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = yaml.safe_load(file)
+            validate_config(data)
+        except (OSError, yaml.YAMLError, ConfigError) as e:
+            if self.data is None:
+                raise
+            print(f"⚠️  Конфиг {self.path} не перечитан, используется прежний: {e}")
+        else:
+            self.data = freeze(data)
+        # Файл с ошибкой не разбирается повторно, пока его снова не изменят
+        self.mtime = mtime
+
+
+shared_configs = {}
+shared_configs_lock = threading.Lock()
+
+
+def get_config(config_path="config/config.yaml"):
+    """Актуальный конфиг: один SharedConfig на файл в пределах процесса"""
+    path = os.path.abspath(config_path)
+    with shared_configs_lock:
+        shared = shared_configs.get(path)
+        if shared is None:
+            shared = shared_configs[path] = SharedConfig(path)
+    return shared.get()
@@ -0,0 +1,92 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+
+# Пары с такими статусами при продолжении запуска повторно не запрашиваются
+COMPLETED_STATUSES = ('found', 'not_found')
+
+
+class CrawlJournal:
+    """Журнал запуска парсинга: результаты пар (магазин, материал) по мере обработки
+
+    Результаты пишутся в SQLite пачками, поэтому прерванный запуск можно
+    продолжить, не повторяя уже выполненные запросы. По завершении запуска
+    найденные цены переносятся в историю, а журнал сворачивается в итоги.
+    """
+
+    def __init__(self, config, store, on_compact=None):
+        storage = config['scout'].get('storage', {})
+        self.store = store
+        self.on_compact = on_compact
+        self.batch_size = storage.get('stream_batch_size', 10)
+        self.max_age = timedelta(hours=storage.get('checkpoint_max_age_hours', 12))
+        self.run_id = None
+        self.completed = {}
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def begin(self):
+        """Продолжение недавнего прерванного запуска или начало нового"""
+        since = (datetime.now() - self.max_age).strftime('%Y-%m-%d %H:%M:%S')
+        self.run_id = None
+
+        for run in self.store.get_unfinished_runs():
+            if self.run_id is None and run['started'] >= since:
+                self.run_id = run['run_id']
+                print(f"♻️  Продолжаем запуск {self.run_id} от {run['started']}")
+            else:
+                # Старые прерванные запуски не продолжаем, но найденные ими цены сохраняем
+                self.compact(run['run_id'])
+
+        self.completed = {}
+        if self.run_id:
+            for entry in self.store.get_journal(self.run_id):
+                if entry['status'] in COMPLETED_STATUSES:
+                    record = None
+                    if entry['status'] == 'found':
+                        record = {key: entry[key] for key in
+                                  ('material', 'supplier', 'price', 'product_name', 'url', 'city', 'date')}
+                    self.completed[(entry['supplier'], entry['material'])] = record
+            print(f"   Уже обработано пар: {len(self.completed)}")
+        else:
+            started = datetime.now()
+            self.run_id = f"{started.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            self.store.start_run(self.run_id, started.strftime('%Y-%m-%d %H:%M:%S'))
+
+        return self.run_id
+
+    def is_completed(self, supplier_name, material):
+        return (supplier_name, material) in self.completed
+
+    def record(self, supplier_name, material, status, record=None):
+        """Результат обработки пары; запись в базу пачками по batch_size"""
+        with self.lock:
+            self.pending.append((status, material, supplier_name, record))
+            if len(self.pending) < self.batch_size:
+                return
+            entries, self.pending = self.pending, []
+            self.store.write_journal(self.run_id, entries)
+
+    def flush(self):
+        """Запись накопленных результатов"""
+        with self.lock:
+            entries, self.pending = self.pending, []
+            if entries:
+                self.store.write_journal(self.run_id, entries)
+
+    def compact(self, run_id):
+        """Завершение запуска: найденные цены переносятся в историю"""
+        compacted = self.store.compact_run(run_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if self.on_compact:
+            self.on_compact(compacted)
+        print(f"📒 Запуск {run_id} завершен: в историю перенесено {len(compacted)} цен")
+        return compacted
+
+    def finish(self):
+        """Завершение текущего запуска"""
+        self.flush()
+        compacted = self.compact(self.run_id)
+        self.run_id = None
+        self.completed = {}
+        return compacted
@@ -0,0 +1,81 @@
+import time
+
+
+class CrawlPlanner:
+    """Планировщик инкрементального парсинга: запрашиваются только устаревшие пары"""
+
+    def __init__(self, config, store):
+        self.config = config
+        self.store = store
+        self.freshness = config['scout'].get('freshness', {})
+        self.priority = config['scout'].get('crawl_priority', {})
+
+    def is_enabled(self):
+        return self.freshness.get('enabled', False)
+
+    def get_max_age_hours(self, supplier_name, material):
+        """Допустимый возраст цены для пары (берется самый строгий из заданных)"""
+        limits = [self.freshness.get('default_max_age_hours', 24)]
+        material_limits = self.freshness.get('materials') or {}
+        supplier_limits = self.freshness.get('suppliers') or {}
+        if material in material_limits:
+            limits.append(material_limits[material])
+        if supplier_name in supplier_limits:
+            limits.append(supplier_limits[supplier_name])
+        return min(limits)
+
+    def get_volatility(self):
+        """Волатильность цен по парам из истории (пусто, если приоритеты выключены)"""
+        if not self.priority.get('enabled', False):
+            return {}
+        return self.store.get_price_volatility(self.priority.get('volatility_window_days', 30))
+
+    def plan(self, suppliers):
+        """План обхода: {магазин: [материалы]} и свежие цены, перенесенные из истории
+
+        Волатильные пары устаревают быстрее и запрашиваются первыми: магазины
+        в плане идут по самой срочной паре, материалы - по срочности. Если задан
+        бюджет запросов на запуск, пары сверх бюджета откладываются до следующего раза;
+        пары без истории не откладываются никогда - для них нечего взять из истории.
+        """
+        materials = self.config['scout']['target_materials']
+        latest = {
+            (item['material'], item['supplier']): item
+            for item in self.store.get_latest_snapshot(set(materials), {name for name, _ in suppliers})
+        }
+        volatility = self.get_volatility()
+        weight = self.priority.get('volatility_weight', 10)
+
+        now = time.time()
+        carried = []
+        candidates = []
+        for supplier_name, supplier_config in suppliers:
+            for material in materials:
+                last_seen = latest.get((material, supplier_name))
+                speedup = 1 + weight * volatility.get((material, supplier_name), 0.0)
+                max_age = self.get_max_age_hours(supplier_name, material) * 3600 / speedup
+
+                if last_seen and now - last_seen['ts'] < max_age:
+                    carried.append(dict(last_seen, carried_forward=True))
+                    continue
+
+                # Пары без истории важнее всего, остальные - по степени устаревания
+                priority = (now - last_seen['ts']) / max_age * speedup if last_seen else float('inf')
+                candidates.append((priority, supplier_name, material, last_seen))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        budget = self.priority.get('max_requests_per_run') if self.priority.get('enabled', False) else None
+        plan = {}
+        deferred = 0
+        for index, (priority, supplier_name, material, last_seen) in enumerate(candidates):
+            if budget and index >= budget and last_seen:
+                deferred += 1
+                carried.append(dict(last_seen, carried_forward=True))
+                continue
+            plan.setdefault(supplier_name, []).append(material)
+
+        if deferred:
+            print(f"💡 Бюджет {budget} запросов: отложено {deferred} наименее изменчивых пар")
+
+        return plan, carried
@@ -0,0 +1,460 @@
+import re
+import json
+from urllib.parse import urljoin
+from datetime import datetime
+from bs4 import BeautifulSoup, SoupStrainer
+import soupsieve
+
+from .text_matcher import TextMatcher, EXCLUDE_WORDS
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# Запасные селекторы цены, если селектор из конфига ничего не нашел
+FALLBACK_PRICE_SELECTORS = [
+    'span.price',
+    'div.price',
+    'meta[itemprop="price"]',
+    'span[class*="price"]',
+    'div[class*="price"]'
+]
+
+# Цена в тексте: разряды через пробел, запятую или точку, затем до двух знаков копеек
+PRICE_RE = re.compile(r'(\d{1,3}(?:[ ,.]\d{3})+|\d+)(?:[.,](\d{1,2}))?(?!\d)')
+
+# Блоки JSON-LD со структурированными данными о товарах (schema.org)
+JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.S | re.I
+)
+
+JSON_DECODER = json.JSONDecoder()
+
+# Способы извлечения цен со страницы (для итогов запуска)
+EXTRACT_PATHS = {
+    'json_ld': 'JSON-LD',
+    'state': 'состояние страницы',
+    'css': 'CSS-селекторы'
+}
+
+# Простой селектор карточки вида "div.class" или "div[attr='value']"
+SIMPLE_SELECTOR_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*)?"
+    r"(?:\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)=['\"]?(?P<value>[^'\"\]]+)['\"]?\])?$"
+)
+
+
+def get_field(data, path):
+    """Значение по пути вида "data.products" или "prices.0.value" (None, если пути нет)"""
+    if not path:
+        return data
+    for key in str(path).split('.'):
+        if isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        elif isinstance(data, dict) and key in data:
+            data = data[key]
+        else:
+            return None
+    return data
+
+
+def iter_json_ld_products(data):
+    """Объекты Product из JSON-LD, в том числе вложенные в @graph и ItemList"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_json_ld_products(item)
+        return
+    if not isinstance(data, dict):
+        return
+
+    types = data.get('@type')
+    if 'Product' in (types if isinstance(types, list) else [types]):
+        yield data
+    for key in ('@graph', 'itemListElement', 'item', 'mainEntity'):
+        if key in data:
+            yield from iter_json_ld_products(data[key])
+
+
+class SoupBackend:
+    """BeautifulSoup с парсером lxml или html.parser и заранее скомпилированными селекторами"""
+
+    def __init__(self, features):
+        self.name = features
+        self.features = features
+
+    def compile(self, selector):
+        return soupsieve.compile(selector)
+
+    def make_strainer(self, card_selector):
+        """Ограничение разбора только поддеревьями карточек товара"""
+        match = SIMPLE_SELECTOR_RE.match(card_selector.strip())
+        if not match or not (match.group('tag') or match.group('cls') or match.group('attr')):
+            return None
+
+        attrs = {}
+        if match.group('cls'):
+            attrs['class'] = match.group('cls')
+        if match.group('attr'):
+            attrs[match.group('attr')] = match.group('value')
+        return SoupStrainer(match.group('tag'), attrs=attrs)
+
+    def parse_cards(self, html, compiled):
+        soup = BeautifulSoup(html, self.features, parse_only=compiled['strainer'])
+        return compiled['product_card'].select(soup)
+
+    def select_one(self, node, selector):
+        return selector.select_one(node)
+
+    def get_text(self, node):
+        return node.get_text(strip=True)
+
+    def get_attr(self, node, name):
+        return node.get(name)
+
+
+class SelectolaxBackend:
+    """selectolax (Lexbor) - самый быстрый вариант, если пакет установлен"""
+
+    name = 'selectolax'
+
+    def compile(self, selector):
+        # selectolax кэширует разобранные селекторы сам, храним строку
+        return selector
+
+    def make_strainer(self, card_selector):
+        return None
+
+    def parse_cards(self, html, compiled):
+        return HTMLParser(html).css(compiled['product_card'])
+
+    def select_one(self, node, selector):
+        return node.css_first(selector)
+
+    def get_text(self, node):
+        return node.text(strip=True)
+
+    def get_attr(self, node, name):
+        return node.attributes.get(name)
+
+
+def create_backend(name='auto'):
+    """Выбор HTML-бэкенда: selectolax -> lxml -> html.parser"""
+    if name in ('auto', 'selectolax') and HTMLParser is not None:
+        return SelectolaxBackend()
+    if name in ('auto', 'selectolax', 'lxml') and LXML_AVAILABLE:
+        return SoupBackend('lxml')
+    return SoupBackend('html.parser')
+
+
+class HtmlExtractor:
+    """Извлечение товаров и цен из страниц поиска"""
+
+    def __init__(self, config, backend=None):
+        self.config = config
+        settings = config['scout'].get('parser_settings', {})
+        self.backend = backend or create_backend(settings.get('html_backend', 'auto'))
+        self.compiled_selectors = {}
+        # Названия товаров сверяются с запросом общим выражением по всем материалам
+        self.matcher = TextMatcher(config['scout']['target_materials'], EXCLUDE_WORDS)
+
+    def get_compiled_selectors(self, supplier_name):
+        """Селекторы магазина, скомпилированные один раз"""
+        compiled = self.compiled_selectors.get(supplier_name)
+        if compiled is None:
+            selectors = self.config['scout']['suppliers'][supplier_name]['selectors']
+            compiled = {
+                key: self.backend.compile(selector)
+                for key, selector in selectors.items()
+            }
+            compiled['price_selectors'] = [
+                self.backend.compile(selector)
+                for selector in [selectors['product_price']] + FALLBACK_PRICE_SELECTORS
+            ]
+            compiled['strainer'] = self.backend.make_strainer(selectors['product_card'])
+            compiled['state_re'] = self.compile_state_pattern(supplier_name)
+            self.compiled_selectors[supplier_name] = compiled
+        return compiled
+
+    def compile_state_pattern(self, supplier_name):
+        """Выражение для поиска JSON-состояния страницы (если оно описано в конфиге)"""
+        structured = self.config['scout']['suppliers'][supplier_name].get('structured_data') or {}
+        state = structured.get('state')
+        if not state:
+            return None
+        if state.get('script_id'):
+            return re.compile(
+                rf'<script[^>]*\bid=["\']{re.escape(state["script_id"])}["\'][^>]*>(.*?)</script>', re.S
+            )
+        return re.compile(rf'{re.escape(state["variable"])}\s*=\s*')
+
+    def parse_real_search_results(self, html, supplier_name, original_query):
+        """Парсинг реальных результатов поиска"""
+        products, _ = self.parse_search_page(html, supplier_name, original_query)
+        return products
+
+    def parse_search_page(self, html, supplier_name, original_query):
+        """Товары со страницы поиска и способ, которым они найдены
+
+        Сначала ищутся структурированные данные (состояние страницы из конфига,
+        JSON-LD). Если среди них нет подходящих товаров (например, в JSON-LD
+        только рекомендации), используются CSS-селекторы. Способ - тот, которым
+        найден результат.
+        """
+        limit = self.config['scout'].get('parser_settings', {}).get('max_products_per_search', 3)
+
+        products, path = self.extract_structured_products(html, supplier_name)
+        relevant = self.filter_relevant(products, original_query, limit)
+        if not relevant:
+            css_products = self.extract_css_products(html, supplier_name, limit)
+            if css_products or not products:
+                relevant, path = self.filter_relevant(css_products, original_query, limit), 'css'
+        return relevant, path
+
+    def filter_relevant(self, products, original_query, limit):
+        """Первые limit товаров, названия которых подходят к запросу"""
+        return [
+            product for product in products[:limit]
+            if self.is_relevant_product(product['name'], original_query)
+        ]
+
+    def extract_css_products(self, html, supplier_name, limit=None):
+        """Товары из карточек по селекторам магазина"""
+        supplier_config = self.config['scout']['suppliers'][supplier_name]
+        compiled = self.get_compiled_selectors(supplier_name)
+
+        products = []
+
+        # Ищем товары по селектору карточки товара
+        product_cards = self.backend.parse_cards(html, compiled)
+
+        for card in product_cards[:limit]:
+            try:
+                product_data = self.extract_real_product_data(card, compiled, supplier_config['base_url'])
+                if product_data:
+                    products.append(product_data)
+            except Exception as e:
+                continue
+
+        return products
+
+    def extract_structured_products(self, html, supplier_name):
+        """Товары из структурированных данных страницы: (товары, способ) или ([], None)"""
+        supplier_config = self.config['scout']['suppliers'][supplier_name]
+        structured = supplier_config.get('structured_data') or {}
+        base_url = supplier_config['base_url']
+
+        state = structured.get('state')
+        if state:
+            items = self.find_state_items(html, state, self.get_compiled_selectors(supplier_name)['state_re'])
+            products = self.map_json_items(items, state['fields'], base_url)
+            if products:
+                return products, 'state'
+
+        if structured.get('json_ld', True) and 'ld+json' in html:
+            products = self.extract_json_ld_products(html, base_url)
+            if products:
+                return products, 'json_ld'
+
+        return [], None
+
+    def find_state_items(self, html, state, state_re):
+        """Список товаров из JSON-состояния страницы (None, если его нет)"""
+        match = state_re.search(html)
+        if not match:
+            return None
+        try:
+            if state.get('script_id'):
+                data = json.loads(match.group(1))
+            else:
+                # После объекта обычно идет ";" или другой код, поэтому raw_decode
+                data, _ = JSON_DECODER.raw_decode(html, match.end())
+        except ValueError:
+            return None
+        return get_field(data, state.get('items_path'))
+
+    def extract_json_ld_products(self, html, base_url):
+        """Товары из блоков JSON-LD (Product с Offer или AggregateOffer)"""
+        products = []
+        for block in JSON_LD_RE.findall(html):
+            try:
+                data = json.loads(block)
+            except ValueError:
+                continue
+
+            for item in iter_json_ld_products(data):
+                name = item.get('name')
+                offers = item.get('offers')
+                price = self.get_offer_price(offers)
+                if not name or not price:
+                    continue
+                product_url = item.get('url') or (offers.get('url') if isinstance(offers, dict) else None)
+                products.append({
+                    'name': str(name).strip(),
+                    'price': price,
+                    'url': urljoin(base_url, product_url) if product_url else "",
+                    'date_found': datetime.now()
+                })
+        return products
+
+    def get_offer_price(self, offers):
+        """Минимальная цена в рублях из Offer, AggregateOffer или списка предложений"""
+        if isinstance(offers, list):
+            prices = [price for price in map(self.get_offer_price, offers) if price]
+            return min(prices) if prices else None
+        if not isinstance(offers, dict):
+            return None
+        if offers.get('priceCurrency') not in (None, 'RUB', 'RUR'):
+            return None
+
+        value = offers.get('price', offers.get('lowPrice'))
+        if value is None and isinstance(offers.get('priceSpecification'), dict):
+            value = offers['priceSpecification'].get('price')
+        return self.to_price(value)
+
+    def to_price(self, value):
+        """Цена из числа или строки"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return float(value) if value > 0 else None
+        return self.clean_price(value)
+
+    def extract_real_product_data(self, product_element, compiled, base_url):
+        """Извлечение реальных данных о товаре"""
+        # Название товара
+        title_element = self.backend.select_one(product_element, compiled['product_title'])
+        if not title_element:
+            return None
+
+        product_name = self.backend.get_text(title_element)
+
+        # Цена товара
+        price = self.extract_real_price(product_element, compiled)
+        if not price:
+            return None
+
+        # Ссылка на товар
+        link_element = self.backend.select_one(product_element, compiled['product_link'])
+        product_url = self.backend.get_attr(link_element, 'href') if link_element else None
+        if product_url:
+            if not product_url.startswith('http'):
+                product_url = urljoin(base_url, product_url)
+        else:
+            product_url = ""
+
+        return {
+            'name': product_name,
+            'price': price,
+            'url': product_url,
+            'date_found': datetime.now()
+        }
+
+    def extract_real_price(self, product_element, compiled):
+        """Извлечение реальной цены"""
+        price_text = ""
+
+        # Пробуем разные селекторы цены
+        for selector in compiled['price_selectors']:
+            price_element = self.backend.select_one(product_element, selector)
+            if price_element:
+                content = self.backend.get_attr(price_element, 'content')
+                if content:  # Для meta тегов
+                    price_text = content
+                else:
+                    price_text = self.backend.get_text(price_element)
+                if price_text:
+                    break
+
+        return self.clean_price(price_text)
+
+    def clean_price(self, price_text):
+        """Очистка и преобразование цены в число
+
+        Разделители разрядов отбрасываются, копейки сохраняются: "1 234,50 ₽" -> 1234.5
+        """
+        if not price_text:
+            return None
+
+        text = str(price_text).replace('\xa0', ' ').replace('\u2009', ' ').replace('\u202f', ' ')
+        match = PRICE_RE.search(text)
+        if not match:
+            return None
+
+        whole = re.sub(r'\D', '', match.group(1))
+        return float(f"{whole}.{match.group(2) or 0}")
+
+    def is_relevant_product(self, product_name, search_query):
+        """Проверка релевантности товара запросу (30% совпадающих слов достаточно)"""
+        return self.matcher.is_relevant(product_name, search_query, min_share=0.3)
+
+    def parse_listing(self, text, supplier_name):
+        """Все товары страницы каталога или ответа JSON-API (без проверки релевантности)"""
+        supplier_config = self.config['scout']['suppliers'][supplier_name]
+        bulk = supplier_config['bulk']
+        if bulk.get('type', 'html') == 'json':
+            items = get_field(json.loads(text), bulk.get('items_path'))
+            return self.map_json_items(items, bulk['fields'], supplier_config['base_url'])
+
+        products, _ = self.extract_structured_products(text, supplier_name)
+        return products or self.extract_css_products(text, supplier_name)
+
+    def map_json_items(self, items, fields, base_url):
+        """Товары из списка JSON-объектов по соответствию полей из конфига"""
+        products = []
+        for item in items if isinstance(items, list) else []:
+            name = get_field(item, fields['name'])
+            price = self.to_price(get_field(item, fields['price']))
+            if not name or not price:
+                continue
+
+            product_url = get_field(item, fields['url']) if fields.get('url') else None
+            products.append({
+                'name': str(name),
+                'price': price,
+                'url': urljoin(base_url, str(product_url)) if product_url else "",
+                'date_found': datetime.now()
+            })
+        return products
+
+    def match_listing(self, products, materials, min_share=0.5):
+        """Распределение товаров каталога по материалам: {материал: [товары]}
+
+        Название каждого товара просматривается один раз, после чего
+        сверяется со всеми материалами. Каталог не отфильтрован поиском
+        магазина, поэтому совпадение только по числам и единицам не считается.
+        """
+        matches = {material: [] for material in materials}
+        terms = {material: self.matcher.get_phrase_terms(material) for material in materials}
+
+        for product in products:
+            found, excluded = self.matcher.scan(product['name'])
+            if excluded or not found:
+                continue
+            for material in materials:
+                if self.matcher.is_match(terms[material], found, min_share):
+                    matches[material].append(product)
+        return matches
+
+
+# Экстрактор процесса-разборщика (создается один раз при запуске процесса)
+worker_extractor = None
+
+
+def init_parse_worker(config):
+    """Инициализация процесса из пула разбора"""
+    global worker_extractor
+    worker_extractor = HtmlExtractor(config)
+
+
+def parse_in_worker(supplier_name, html, query):
+    """Разбор страницы поиска в процессе пула: (товары, способ извлечения)"""
+    return worker_extractor.parse_search_page(html, supplier_name, query)
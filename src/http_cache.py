@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    """Дисковый кэш страниц поиска с TTL, условной перепроверкой и LRU-вытеснением"""
+
+    def __init__(self, cache_dir="data/http_cache", ttl_seconds=3600, max_size_mb=50):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self.load_index()
+        self.reset_stats()
+
+    def load_index(self):
+        """Загрузка индекса кэша"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        """Атомарная запись индекса кэша"""
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def flush(self):
+        """Сохранение индекса (время последнего обращения для LRU)"""
+        with self.lock:
+            self.save_index()
+
+    def get_key(self, url):
+        """Ключ кэша по URL"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get_path(self, key):
+        """Путь к файлу с телом ответа"""
+        return os.path.join(self.cache_dir, f"{key}.html")
+
+    def is_fresh(self, url):
+        """Есть ли свежая (в пределах TTL) копия страницы"""
+        with self.lock:
+            entry = self.index.get(self.get_key(url))
+            return bool(entry) and time.time() - entry['stored_at'] < self.ttl_seconds
+
+    def lookup(self, url):
+        """Поиск страницы в кэше, возвращает запись с текстом или None"""
+        key = self.get_key(url)
+        with self.lock:
+            entry = self.index.get(key)
+            if not entry:
+                return None
+
+            try:
+                with open(self.get_path(key), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except OSError:
+                # Файл удален вручную - забываем запись
+                del self.index[key]
+                return None
+
+            entry['accessed_at'] = time.time()
+            return dict(entry, text=text, fresh=time.time() - entry['stored_at'] < self.ttl_seconds)
+
+    def get_conditional_headers(self, entry):
+        """Заголовки для условного запроса по сохраненной копии"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, text, headers):
+        """Сохранение ответа в кэш"""
+        key = self.get_key(url)
+        data = text.encode('utf-8')
+        now = time.time()
+
+        with self.lock:
+            with open(self.get_path(key), 'wb') as f:
+                f.write(data)
+
+            self.index[key] = {
+                'url': url,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'stored_at': now,
+                'accessed_at': now,
+                'size': len(data)
+            }
+            self.evict()
+            self.save_index()
+
+    def revalidate(self, url):
+        """Сервер ответил 304 - продлеваем срок жизни копии"""
+        with self.lock:
+            entry = self.index.get(self.get_key(url))
+            if entry:
+                entry['stored_at'] = entry['accessed_at'] = time.time()
+                self.save_index()
+
+    def evict(self):
+        """Удаление давно не использованных страниц при превышении размера"""
+        total_size = sum(entry['size'] for entry in self.index.values())
+        if total_size <= self.max_bytes:
+            return
+
+        for key in sorted(self.index, key=lambda k: self.index[k]['accessed_at']):
+            if total_size <= self.max_bytes:
+                break
+            total_size -= self.index.pop(key)['size']
+            try:
+                os.remove(self.get_path(key))
+            except OSError:
+                pass
+
+    def record(self, event):
+        """Учет события: hit, revalidated или miss"""
+        with self.lock:
+            self.stats[event] += 1
+
+    def reset_stats(self):
+        """Сброс счетчиков перед новым запуском"""
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+
+    def print_stats(self):
+        """Вывод счетчиков кэша"""
+        total = sum(self.stats.values())
+        if not total:
+            return
+
+        hits = self.stats['hit'] + self.stats['revalidated']
+        print(f"\n🗄️  Кэш страниц: попаданий {hits} из {total} "
+              f"(свежих {self.stats['hit']}, перепроверено {self.stats['revalidated']}), "
+              f"промахов {self.stats['miss']}")
@@ -1,13 +1,13 @@
 import csv
 import os
 import sys
-import yaml
 import json
 from datetime import datetime
 
 # Добавляем путь для импорта
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from src.config import get_config, freeze
 from src.price_monitor import PriceMonitor
 from src.supplier_analyzer import SupplierAnalyzer
 
@@ -17,19 +17,21 @@ class ConstructionAIScout:
         self.load_config()
         
         self.price_monitor = PriceMonitor(config_path)
-        self.supplier_analyzer = SupplierAnalyzer(config_path)
+        self.supplier_analyzer = SupplierAnalyzer(config_path, store=self.price_monitor.store)
         
         # Создаем папки
         os.makedirs("data/reports", exist_ok=True)
 
     def load_config(self):
-        """Загрузка конфигурации"""
+        """Загрузка конфигурации (перечитывается, если config.yaml изменился)"""
+        previous = getattr(self, 'config', None)
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                self.config = yaml.safe_load(file)
+            self.config = get_config(self.config_path)
         except Exception as e:
-            print(f"❌ Ошибка загрузки конфига: {e}")
-            self.config = {'scout': {'target_materials': [], 'suppliers': {}}}
+            # Если конфиг уже загружен, работаем с ним
+            if previous is None:
+                print(f"❌ Ошибка загрузки конфига: {e}")
+                self.config = freeze({'scout': {'target_materials': [], 'suppliers': {}, 'parser_settings': {}}})
 
     def daily_scouting_report(self, use_parser=False):
         """Ежедневный отчет по ценам"""
@@ -39,23 +41,22 @@ class ConstructionAIScout:
             'date': datetime.now().strftime('%Y-%m-%d %H:%M'),
             'materials_analysis': [],
             'summary': '',
-            'total_economy': 0
+            'total_economy': 0,
+            'suppliers_ranking': []
         }
         
         try:
             # Получаем цены (реальные или тестовые)
+            # Цены сохраняются в хранилище по мере сбора
             if use_parser:
                 print("🌐 Используем реальный парсинг...")
-                prices_data = self.price_monitor.get_all_prices(use_parser=True)
+                prices_data = self.price_monitor.collect_prices(use_parser=True)
             else:
                 print("🔧 Используем тестовые данные...")
-                prices_data = self.price_monitor.get_all_prices(use_parser=False)
+                prices_data = self.price_monitor.collect_prices(use_parser=False)
             
-            # Сохраняем цены
-            self.price_monitor.save_prices(prices_data)
-            
-            # Находим лучшие цены
-            best_prices = self.price_monitor.find_best_prices()
+            # Находим лучшие цены по только что собранным данным
+            best_prices = self.price_monitor.find_best_prices(prices_data)
             
             # Формируем отчет
             economy = 0
@@ -73,6 +74,7 @@ class ConstructionAIScout:
                 })
             
             report['total_economy'] = round(economy, 2)
+            report['suppliers_ranking'] = self.supplier_analyzer.analyze_all_suppliers()
             report['summary'] = f"Проанализировано {len(best_prices)} материалов. Экономия: {report['total_economy']} руб."
             
             # Сохраняем отчет
@@ -110,12 +112,18 @@ class ConstructionAIScout:
         """Проверка поставщика"""
         return self.supplier_analyzer.analyze_supplier(supplier_name)
 
+    def get_suppliers_ranking(self):
+        """Рейтинг всех поставщиков (кэшируется до новых цен)"""
+        return self.supplier_analyzer.analyze_all_suppliers()
+
     def get_available_suppliers(self):
         """Получение списка доступных поставщиков"""
+        self.load_config()
         return list(self.config['scout']['suppliers'].keys())
 
     def get_available_materials(self):
         """Получение списка доступных материалов"""
+        self.load_config()
         return self.config['scout']['target_materials']
 
 if __name__ == "__main__":
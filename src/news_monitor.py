@@ -1,15 +1,42 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import feedparser
 import pandas as pd
 from datetime import datetime
-import yaml
 import re
 
+from .config import get_config
+from .text_matcher import TextMatcher
+from .news_store import NewsStore, ITEM_FIELDS
+
+POSITIVE_WORDS = [
+    'рост', 'снижение', 'увеличился', 'дешевеет', 'улучшение',
+    'развитие', 'инвестиции', 'строительство', 'развитие'
+]
+
+NEGATIVE_WORDS = [
+    'подорожание', 'кризис', 'дефицит', 'забастовка', 'проблемы',
+    'задержки', 'срыв', 'конфликт', 'санкции'
+]
+
 class NewsMonitor:
     def __init__(self, config_path="config/config.yaml"):
-        with open(config_path, 'r', encoding='utf-8') as file:
-            self.config = yaml.safe_load(file)
+        self.config_path = config_path
+        self.config = None
+        self.refresh_config()
+        self.store = NewsStore(self.settings.get('db_path', 'data/news.db'))
+
+    def refresh_config(self):
+        """Ключевые слова и настройки из актуального конфига (после изменения config.yaml)"""
+        config = get_config(self.config_path)
+        if config is self.config:
+            return
+        self.config = config
+        
+        self.keywords = list(self.config['scout']['target_materials'])
+        self.matcher = TextMatcher(self.keywords)
         
-        self.keywords = self.config['scout']['target_materials']
+        self.settings = self.config['scout'].get('news', {})
 
     def analyze_sentiment(self, text):
         """Простой анализ тональности текста"""
@@ -18,72 +45,125 @@ class NewsMonitor:
             
         text_lower = text.lower()
         
-        positive_words = [
-            'рост', 'снижение', 'увеличился', 'дешевеет', 'улучшение',
-            'развитие', 'инвестиции', 'строительство', 'развитие'
-        ]
-        
-        negative_words = [
-            'подорожание', 'кризис', 'дефицит', 'забастовка', 'проблемы',
-            'задержки', 'срыв', 'конфликт', 'санкции'
-        ]
-        
-        positive_score = sum(1 for word in positive_words if word in text_lower)
-        negative_score = sum(1 for word in negative_words if word in text_lower)
+        positive_score = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+        negative_score = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
         
         return positive_score - negative_score
 
     def extract_material_mentions(self, text):
-        """Извлечение упоминаний материалов в тексте"""
-        mentions = []
-        for material in self.keywords:
-            # Простой поиск по ключевым словам
-            material_keywords = material.lower().split()
-            if any(keyword in text.lower() for keyword in material_keywords):
-                mentions.append(material)
+        """Извлечение упоминаний материалов в тексте (один проход по тексту)"""
+        return self.matcher.find_phrases(text)
+
+    def analyze_news(self, news_df):
+        """Тональность и упоминания материалов для всех новостей таблицы сразу
+
+        Таблица с колонками title и summary (например, архив новостей) разбирается
+        за один проход: слова тональности ищутся строковыми операциями pandas
+        по всему столбцу, материалы - одним выражением TextMatcher.
+        Возвращает копию таблицы с колонками sentiment и mentions.
+        """
+        self.refresh_config()
+        news_df = news_df.copy()
+        text = (news_df['title'].fillna('') + ' ' + news_df['summary'].fillna('')).str.lower()
+        
+        sentiment = pd.Series(0, index=news_df.index)
+        for word in POSITIVE_WORDS:
+            sentiment += text.str.contains(word, regex=False)
+        for word in NEGATIVE_WORDS:
+            sentiment -= text.str.contains(word, regex=False)
+        news_df['sentiment'] = sentiment
         
-        return mentions
+        matches = pd.DataFrame(self.matcher.match_series(text), index=news_df.index, columns=self.keywords)
+        news_df['mentions'] = [
+            [keyword for keyword, found in zip(self.keywords, row) if found]
+            for row in matches.itertuples(index=False)
+        ]
+        return news_df
 
     def get_industry_news(self):
-        """Получение и анализ новостей строительной отрасли"""
-        news_items = []
+        """Получение и анализ новостей строительной отрасли
+
+        Ленты опрашиваются параллельно условными запросами (ETag/Last-Modified),
+        анализируются только записи, которых еще не было. Возвращаются
+        релевантные новости за последние news.window_days дней.
+        """
+        self.refresh_config()
+        feeds = self.config['scout'].get('news_feeds') or []
+        
+        entries = []
+        feed_states = []
+        with ThreadPoolExecutor(max_workers=self.settings.get('max_workers', 4)) as executor:
+            for feed_url, feed, new_entries in executor.map(self.fetch_new_entries, feeds):
+                if feed is not None:
+                    feed_states.append((feed_url, feed.get('etag'), feed.get('modified')))
+                entries.extend(self.get_entry_fields(entry, feed_url) for entry in new_entries)
         
-        for feed_url in self.config['scout']['news_feeds']:
-            try:
-                print(f"Проверка ленты: {feed_url}")
-                feed = feedparser.parse(feed_url)
-                
-                for entry in feed.entries[:10]:  # Берем последние 10 новостей
-                    title = entry.get('title', '')
-                    summary = entry.get('summary', '')
-                    published = entry.get('published', '')
-                    
-                    full_text = f"{title} {summary}"
-                    
-                    # Анализируем материал
-                    mentions = self.extract_material_mentions(full_text)
-                    sentiment = self.analyze_sentiment(full_text)
-                    
-                    if mentions:  # Сохраняем только релевантные новости
-                        news_items.append({
-                            'title': title,
-                            'summary': summary[:200] + '...' if len(summary) > 200 else summary,
-                            'published': published,
-                            'mentions': mentions,
-                            'sentiment': sentiment,
-                            'source': feed_url,
-                            'date_collected': datetime.now()
-                        })
-                
-            except Exception as e:
-                print(f"Ошибка при обработке ленты {feed_url}: {e}")
-                continue
+        if entries:
+            # Одна и та же запись может прийти из нескольких лент
+            new_df = self.analyze_news(pd.DataFrame(entries).drop_duplicates('key'))
+            summary = new_df['summary']
+            new_df['summary'] = summary.where(summary.str.len() <= 200, summary.str[:200] + '...')
+            new_df['date_collected'] = datetime.now()
+            
+            self.store.add_items(new_df.to_dict('records'))
+            relevant = int(new_df['mentions'].astype(bool).sum())
+            print(f"📰 Новых записей: {len(new_df)}, из них релевантных: {relevant}")
+        
+        # ETag запоминается после записи новостей, иначе при сбое они потерялись бы
+        for feed_url, etag, modified in feed_states:
+            self.store.set_feed_state(feed_url, etag, modified)
         
-        return pd.DataFrame(news_items)
+        news_items = self.store.get_relevant_items(self.settings.get('window_days', 7))
+        return pd.DataFrame(news_items, columns=ITEM_FIELDS)
+
+    def fetch_new_entries(self, feed_url):
+        """Разобранная лента и записи, которых еще не было (None - лента не изменилась)"""
+        try:
+            print(f"Проверка ленты: {feed_url}")
+            state = self.store.get_feed_state(feed_url)
+            feed = feedparser.parse(feed_url, etag=state['etag'], modified=state['modified'])
+            
+            # Лента не изменилась с прошлого опроса
+            if feed.get('status') == 304:
+                return feed_url, None, []
+            if feed.get('bozo') and not feed.entries:
+                raise feed.get('bozo_exception') or ValueError("лента не разобрана")
+            
+            entries = feed.entries[:self.settings.get('entries_per_feed', 10)]  # Берем последние новости
+            keys = [self.get_entry_key(entry, feed_url) for entry in entries]
+            seen = self.store.get_seen_keys(keys)
+            return feed_url, feed, [entry for entry, key in zip(entries, keys) if key not in seen]
+            
+        except Exception as e:
+            print(f"Ошибка при обработке ленты {feed_url}: {e}")
+            return feed_url, None, []
+
+    def get_entry_key(self, entry, feed_url):
+        """Ключ записи: GUID, ссылка или хэш ленты, заголовка и даты"""
+        key = entry.get('id') or entry.get('link')
+        if key:
+            return key
+        text = f"{feed_url}|{entry.get('title', '')}|{entry.get('published', '')}"
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get_entry_fields(self, entry, feed_url):
+        """Поля записи ленты для анализа"""
+        return {
+            'key': self.get_entry_key(entry, feed_url),
+            'title': entry.get('title', ''),
+            'summary': entry.get('summary', ''),
+            'published': entry.get('published', ''),
+            'source': feed_url
+        }
+
+    def get_critical_news(self, news_df=None):
+        """Получение критически важных новостей
 
-    def get_critical_news(self):
-        """Получение критически важных новостей"""
-        news_df = self.get_industry_news()
+        Если таблица новостей уже получена (get_industry_news), фильтруется она,
+        а ленты повторно не опрашиваются.
+        """
+        if news_df is None:
+            news_df = self.get_industry_news()
         
         # Критическими считаем новости с негативным сентиментом
         critical_news = news_df[news_df['sentiment'] < -1]
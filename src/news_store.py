@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+NEWS_COLUMNS = ['key', 'source', 'title', 'summary', 'published', 'mentions', 'sentiment', 'relevant', 'date_collected']
+
+# Поля новости в выдаче NewsMonitor
+ITEM_FIELDS = ['title', 'summary', 'published', 'mentions', 'sentiment', 'source', 'date_collected']
+
+
+class NewsStore:
+    """Состояние лент (ETag/Last-Modified) и уже обработанные новости на SQLite"""
+
+    def __init__(self, db_path="data/news.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        """Создание таблиц и индексов"""
+        with self.lock, self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS news_feeds (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    modified TEXT,
+                    checked_at TEXT
+                );
+                -- Все увиденные записи лент: по ключу (GUID или ссылка) запись
+                -- повторно не анализируется
+                CREATE TABLE IF NOT EXISTS news_items (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    title TEXT,
+                    summary TEXT,
+                    published TEXT,
+                    mentions TEXT,
+                    sentiment INTEGER,
+                    relevant INTEGER NOT NULL,
+                    date_collected TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_news_relevant_date
+                    ON news_items (relevant, date_collected);
+            """)
+
+    def get_feed_state(self, url):
+        """ETag и Last-Modified ленты с прошлого опроса"""
+        with self.lock:
+            row = self.conn.execute("SELECT etag, modified FROM news_feeds WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else {'etag': None, 'modified': None}
+
+    def set_feed_state(self, url, etag, modified):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO news_feeds (url, etag, modified, checked_at) VALUES (?, ?, ?, ?)",
+                (url, etag, modified, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+
+    def get_seen_keys(self, keys):
+        """Ключи из списка, которые уже встречались"""
+        keys = list(keys)
+        seen = set()
+        with self.lock:
+            # Ограничение SQLite на число параметров запроса
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key FROM news_items WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                seen.update(row['key'] for row in rows)
+        return seen
+
+    def add_items(self, items):
+        """Запись обработанных новостей одной транзакцией"""
+        rows = [
+            (
+                item['key'],
+                item['source'],
+                item['title'],
+                item['summary'],
+                item['published'],
+                json.dumps(item['mentions'], ensure_ascii=False),
+                item['sentiment'],
+                int(bool(item['mentions'])),
+                item['date_collected'].strftime('%Y-%m-%d %H:%M:%S')
+            )
+            for item in items
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO news_items ({', '.join(NEWS_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(NEWS_COLUMNS))})",
+                rows
+            )
+        return len(rows)
+
+    def get_relevant_items(self, days=None):
+        """Новости с упоминаниями материалов, собранные за последние days дней"""
+        query = f"SELECT {', '.join(ITEM_FIELDS)} FROM news_items WHERE relevant = 1"
+        params = []
+        if days is not None:
+            query += " AND date_collected >= ?"
+            params.append((datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S'))
+        query += " ORDER BY date_collected, rowid"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        items = []
+        for row in rows:
+            item = dict(row)
+            item['mentions'] = json.loads(item['mentions'])
+            item['date_collected'] = datetime.strptime(item['date_collected'], '%Y-%m-%d %H:%M:%S')
+            items.append(item)
+        return items
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
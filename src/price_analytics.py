@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+def find_best_prices_python(prices_data):
+    """Лучшие цены по каждому материалу (построчно, для небольших выборок)"""
+    best_prices = []
+
+    # Группируем по материалам
+    materials_dict = {}
+    for item in prices_data:
+        material = item['material']
+        if material not in materials_dict:
+            materials_dict[material] = []
+        materials_dict[material].append(item)
+
+    # Находим лучшие цены
+    for material, items in materials_dict.items():
+        if items:
+            best_item = min(items, key=lambda x: x['price'])
+            all_prices = [item['price'] for item in items]
+            avg_price = sum(all_prices) / len(all_prices)
+            economy = avg_price - best_item['price']
+
+            best_prices.append({
+                'material': material,
+                'best_supplier': best_item['supplier'],
+                'best_price': best_item['price'],
+                'product_name': best_item.get('product_name', ''),
+                'url': best_item.get('url', ''),
+                'economy': round(economy, 2),
+                'all_options': [{'supplier': item['supplier'], 'price': item['price']} for item in items]
+            })
+
+    return best_prices
+
+
+def build_price_matrix(materials, suppliers, prices):
+    """Матрица материал x поставщик с минимальной ценой в каждой ячейке"""
+    material_codes, material_index = pd.factorize(materials)
+    supplier_codes, supplier_index = pd.factorize(suppliers)
+
+    matrix = np.full((len(material_index), len(supplier_index)), np.nan)
+    np.fmin.at(matrix, (material_codes, supplier_codes), prices)
+
+    return pd.DataFrame(matrix, index=material_index, columns=supplier_index), material_codes
+
+
+def get_price_columns(prices):
+    """Столбцы материал/поставщик/цена из списка записей или DataFrame"""
+    if isinstance(prices, pd.DataFrame):
+        return (
+            prices['material'].to_numpy(dtype=object),
+            prices['supplier'].to_numpy(dtype=object),
+            prices['price'].to_numpy(dtype=object)
+        )
+    return (
+        np.array([item['material'] for item in prices], dtype=object),
+        np.array([item['supplier'] for item in prices], dtype=object),
+        np.array([item['price'] for item in prices], dtype=object)
+    )
+
+
+def get_rows(prices, rows):
+    """Записи с указанными номерами в виде словарей"""
+    if isinstance(prices, pd.DataFrame):
+        return prices.iloc[rows].to_dict('records')
+    return [prices[row] for row in rows]
+
+
+def find_best_prices_vectorized(prices):
+    """Лучшие цены по каждому материалу за один векторный проход
+
+    Принимает список записей или DataFrame (например, срез из хранилища).
+    Результат совпадает с find_best_prices_python: при равных ценах
+    выбирается первая по порядку запись, среднее считается в том же порядке.
+    """
+    if len(prices) == 0:
+        return []
+
+    materials, suppliers, price_values = get_price_columns(prices)
+    price_array = price_values.astype(float)
+
+    matrix, material_codes = build_price_matrix(materials, suppliers, price_array)
+    materials_count = len(matrix.index)
+
+    best_by_material = np.nanmin(matrix.to_numpy(), axis=1)
+
+    # Первая запись с минимальной ценой своего материала
+    is_best = price_array == best_by_material[material_codes]
+    best_codes, first_positions = np.unique(material_codes[is_best], return_index=True)
+    best_rows = np.empty(materials_count, dtype=int)
+    best_rows[best_codes] = np.flatnonzero(is_best)[first_positions]
+
+    # bincount суммирует в исходном порядке, как и sum() в построчном варианте
+    sums = np.bincount(material_codes, weights=price_array, minlength=materials_count)
+    counts = np.bincount(material_codes, minlength=materials_count)
+    economies = (sums / counts - price_array[best_rows]).tolist()
+
+    # Варианты, упорядоченные по материалам с сохранением исходного порядка внутри группы
+    order = np.argsort(material_codes, kind='stable')
+    options = [
+        {'supplier': supplier, 'price': price}
+        for supplier, price in zip(suppliers[order].tolist(), price_values[order].tolist())
+    ]
+    bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+
+    best_prices = []
+    for code, (material, best_item) in enumerate(zip(matrix.index, get_rows(prices, best_rows))):
+        best_prices.append({
+            'material': material,
+            'best_supplier': best_item['supplier'],
+            'best_price': best_item['price'],
+            'product_name': best_item.get('product_name', ''),
+            'url': best_item.get('url', ''),
+            'economy': round(economies[code], 2),
+            'all_options': options[bounds[code]:bounds[code + 1]]
+        })
+
+    return best_prices
@@ -0,0 +1,100 @@
+import os
+import shutil
+import uuid
+from datetime import datetime
+import pandas as pd
+
+from .price_store import parse_timestamp, get_window_start
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+
+ARCHIVE_COLUMNS = ['material', 'supplier', 'price', 'product_name', 'url', 'city', 'date']
+
+
+class ParquetArchive:
+    """Колоночный архив истории цен (Parquet, разделы по дням) для аналитики"""
+
+    def __init__(self, root="data/history_parquet"):
+        if pa is None:
+            raise ImportError("Для Parquet-архива нужен пакет pyarrow")
+
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        self.schema = pa.schema([
+            ('material', pa.string()),
+            ('supplier', pa.string()),
+            ('price', pa.float64()),
+            ('product_name', pa.string()),
+            ('url', pa.string()),
+            ('city', pa.string()),
+            ('date', pa.timestamp('s')),
+            ('day', pa.string())
+        ])
+        self.partitioning = ds.partitioning(pa.schema([('day', pa.string())]), flavor='hive')
+
+    def append(self, prices_data):
+        """Дописывание пачки цен новыми файлами в разделы по дням"""
+        columns = {name: [] for name in self.schema.names}
+        for item in prices_data:
+            moment = parse_timestamp(item.get('date', '')) or datetime.now().replace(microsecond=0)
+            columns['material'].append(item['material'])
+            columns['supplier'].append(item['supplier'])
+            columns['price'].append(float(item['price']))
+            columns['product_name'].append(item.get('product_name', ''))
+            columns['url'].append(item.get('url', ''))
+            columns['city'].append(item.get('city', ''))
+            columns['date'].append(moment)
+            columns['day'].append(moment.date().isoformat())
+
+        if not columns['material']:
+            return 0
+
+        table = pa.Table.from_pydict(columns, schema=self.schema)
+        ds.write_dataset(
+            table,
+            self.root,
+            format='parquet',
+            partitioning=self.partitioning,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        return table.num_rows
+
+    def clear(self):
+        """Удаление всех разделов архива"""
+        for entry in os.listdir(self.root):
+            if entry.startswith('day='):
+                shutil.rmtree(os.path.join(self.root, entry))
+
+    def export_from_store(self, store, batch_size=10000):
+        """Полная выгрузка истории из SQLite в архив"""
+        exported = 0
+        for batch in store.iter_prices(batch_size):
+            exported += self.append(batch)
+        return exported
+
+    def read_history(self, material, days=None, columns=('supplier', 'price', 'date')):
+        """История материала в DataFrame: читаются только нужные столбцы и разделы"""
+        if not any(entry.startswith('day=') for entry in os.listdir(self.root)):
+            return pd.DataFrame(columns=list(columns))
+
+        dataset = ds.dataset(self.root, format='parquet', partitioning=self.partitioning)
+        row_filter = ds.field('material') == material
+        if days is not None:
+            start = get_window_start(days)
+            # Фильтр по разделу отсекает файлы других дней без чтения
+            row_filter &= ds.field('day') >= start.date().isoformat()
+            row_filter &= ds.field('date') >= pa.scalar(start, type=pa.timestamp('s'))
+
+        table = dataset.to_table(columns=list(columns), filter=row_filter)
+        history = table.to_pandas()
+        if 'date' in history.columns:
+            history = history.sort_values('date', kind='stable').reset_index(drop=True)
+        return history
@@ -1,36 +1,146 @@
-import csv
 import os
-import yaml
+import pandas as pd
 import random
 from datetime import datetime
+from .config import get_config, freeze
 from .web_parser import WebPriceParser
+from .price_store import PriceStore, ROLLING_WINDOWS
+from .price_archive import ParquetArchive
+from .price_analytics import find_best_prices_python, find_best_prices_vectorized
+from .crawl_planner import CrawlPlanner
+from .crawl_journal import CrawlJournal
+from .alerts import AlertEngine
+
+# Адрес товаров тестового режима: такие цены не попадают в историю
+MOCK_URL = "https://example.com/"
 
 class PriceMonitor:
     def __init__(self, config_path="config/config.yaml"):
         self.config_path = config_path
         self.load_config()
-        self.parser = WebPriceParser(self.config)
         
         # Создаем папку для данных
         os.makedirs("data", exist_ok=True)
         self.data_file = "data/historical_prices.csv"
+        
+        # История цен хранится в SQLite, старый CSV переносится один раз
+        storage = self.config['scout'].get('storage', {})
+        self.store = PriceStore("data/prices.db", storage.get('rolling_windows', ROLLING_WINDOWS))
+        self.store.import_csv(self.data_file)
+        self.purge_mock_prices()
+        self.best_prices_cache = None
+        self.parser = None
+        self.create_components()
+
+    def create_components(self):
+        """Компоненты, которые разбирают свои разделы конфига при создании"""
+        if self.parser:
+            self.parser.transport.close()
+        self.parser = WebPriceParser(self.config)
+        self.archive = self.create_archive()
+        self.planner = CrawlPlanner(self.config, self.store)
+        self.journal = CrawlJournal(self.config, self.store, on_compact=self.archive_prices)
+        self.alerts = AlertEngine(self.config, self.store)
+
+    def refresh_config(self):
+        """Пересоздание компонентов, если config.yaml был перечитан
+
+        Хранилище остается прежним: storage.rolling_windows применяется
+        после перезапуска.
+        """
+        if self.load_config():
+            self.create_components()
+            print("🔄 Конфиг перечитан, компоненты обновлены")
+
+    def purge_mock_prices(self):
+        """Однократное удаление цен тестового режима, сохраненных в историю раньше"""
+        if self.store.get_meta('mock_prices_purged'):
+            return
+        deleted = self.store.delete_prices_by_url(MOCK_URL)
+        self.store.set_meta('mock_prices_purged', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        if deleted:
+            print(f"🧹 Из истории удалены тестовые цены: {deleted} записей")
+
+    def create_archive(self):
+        """Parquet-архив для аналитики (если включен и установлен pyarrow)"""
+        storage = self.config['scout'].get('storage', {})
+        if not storage.get('parquet_enabled', False):
+            return None
+        
+        try:
+            archive = ParquetArchive(storage.get('parquet_dir', 'data/history_parquet'))
+        except ImportError as e:
+            print(f"⚠️  Parquet-архив отключен: {e}")
+            return None
+        
+        # Однократная выгрузка уже накопленной истории. Архив, выгруженный до удаления
+        # тестовых цен из хранилища, содержит их и выгружается заново
+        exported_at = self.store.get_meta('parquet_exported')
+        if not exported_at or exported_at < (self.store.get_meta('mock_prices_purged') or ''):
+            archive.clear()
+            exported = archive.export_from_store(self.store)
+            self.store.set_meta('parquet_exported', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            print(f"📦 История выгружена в Parquet: {exported} записей")
+        
+        return archive
 
     def load_config(self):
-        """Загрузка конфигурации"""
+        """Загрузка конфигурации; True, если конфиг сменился с прошлой загрузки"""
+        previous = getattr(self, 'config', None)
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                self.config = yaml.safe_load(file)
+            self.config = get_config(self.config_path)
         except Exception as e:
-            print(f"❌ Ошибка загрузки конфига: {e}")
-            self.config = {'scout': {'target_materials': [], 'suppliers': {}}}
-
-    def get_all_prices(self, use_parser=True):
-        """Получение всех цен"""
-        if use_parser:
-            print("🌐 Запуск автоматического парсинга цен...")
-            return self.parser.parse_all_prices()
-        else:
+            # Если конфиг уже загружен, работаем с ним
+            if previous is None:
+                print(f"❌ Ошибка загрузки конфига: {e}")
+                self.config = freeze({'scout': {'target_materials': [], 'suppliers': {}, 'parser_settings': {}}})
+        return self.config is not previous
+
+    def get_crawl_plan(self):
+        """План обхода {магазин: [материалы]} и свежие цены, взятые из истории"""
+        self.refresh_config()
+        if not self.planner.is_enabled():
+            materials = self.config['scout']['target_materials']
+            return {supplier_name: list(materials) for supplier_name in self.config['scout']['suppliers']}, []
+        
+        # Инкрементальный режим: свежие цены берем из истории
+        plan, carried = self.planner.plan(self.parser.get_target_suppliers())
+        planned = sum(len(materials) for materials in plan.values())
+        print(f"📋 К запросу {planned} пар, из истории взято {len(carried)} свежих цен")
+        return plan, carried
+
+    def collect_prices(self, use_parser=True):
+        """Сбор цен с сохранением в хранилище
+
+        При парсинге результаты пишутся в журнал запуска по мере поступления,
+        поэтому сбой посреди обхода не теряет уже найденные цены: следующий
+        запуск продолжит с необработанных пар. По завершении журнал переносится
+        в историю. Записи возвращаются в порядке поступления из потока парсера,
+        общий список не сортируется.
+
+        Тестовые цены (use_parser=False) в хранилище не пишутся: иначе план
+        обхода счел бы все пары свежими и следующий парсинг ничего не запросил.
+        """
+        self.refresh_config()
+        if not use_parser:
+            print("🧪 Тестовые цены не сохраняются в историю")
             return self.get_mock_prices()
+        
+        print("🌐 Запуск автоматического парсинга цен...")
+        plan, carried = self.get_crawl_plan()
+        
+        self.journal.begin()
+        self.parser.journal = self.journal
+        try:
+            prices_data = list(self.parser.iter_prices(plan=plan))
+        finally:
+            self.parser.journal = None
+            self.journal.flush()
+        
+        # Правила проверяются до переноса цен в историю и обновления агрегатов
+        self.alerts.evaluate(prices_data)
+        self.journal.finish()
+        return prices_data + carried
 
     def get_mock_prices(self):
         """Заглушка для тестирования"""
@@ -59,81 +169,90 @@ class PriceMonitor:
                     'supplier': supplier_name,
                     'price': price,
                     'product_name': f"{material} ({supplier_name})",
-                    'url': f"https://example.com/{material.replace(' ', '-')}",
+                    'url': f"{MOCK_URL}{material.replace(' ', '-')}",
                     'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 })
         
         return prices_data
 
-    def save_prices(self, prices_data):
-        """Сохранение цен в CSV"""
-        file_exists = os.path.exists(self.data_file)
-        
-        with open(self.data_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            if not file_exists:
-                writer.writerow(['material', 'supplier', 'price', 'product_name', 'url', 'date'])
-            
-            for item in prices_data:
-                writer.writerow([
-                    item['material'],
-                    item['supplier'],
-                    item['price'],
-                    item.get('product_name', ''),
-                    item.get('url', ''),
-                    item.get('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                ])
-        
-        print(f"💾 Цены сохранены: {len(prices_data)} записей")
-
-    def find_best_prices(self):
-        """Поиск лучших цен по каждому материалу"""
-        prices_data = self.get_all_prices(use_parser=False)  # Пока используем заглушки
-        best_prices = []
-        
-        # Группируем по материалам
-        materials_dict = {}
-        for item in prices_data:
-            material = item['material']
-            if material not in materials_dict:
-                materials_dict[material] = []
-            materials_dict[material].append(item)
-        
-        # Находим лучшие цены
-        for material, items in materials_dict.items():
-            if items:
-                best_item = min(items, key=lambda x: x['price'])
-                all_prices = [item['price'] for item in items]
-                avg_price = sum(all_prices) / len(all_prices)
-                economy = avg_price - best_item['price']
-                
-                best_prices.append({
-                    'material': material,
-                    'best_supplier': best_item['supplier'],
-                    'best_price': best_item['price'],
-                    'product_name': best_item.get('product_name', ''),
-                    'url': best_item.get('url', ''),
-                    'economy': round(economy, 2),
-                    'all_options': [{'supplier': item['supplier'], 'price': item['price']} for item in items]
-                })
+    def archive_prices(self, prices_data):
+        """Дописывание сохраненных цен в Parquet-архив"""
+        if self.archive:
+            self.archive.append(prices_data)
+
+    def find_best_prices(self, prices_data=None):
+        """Поиск лучших цен по каждому материалу
+
+        prices_data - только что собранные цены. Без них анализируется последний
+        срез из хранилища, результат кэшируется до записи новых цен или
+        смены конфига.
+        """
+        self.refresh_config()
+        if prices_data is not None:
+            # Записи приходят в порядке обхода: сортируется только итог по материалам
+            materials = {material: index for index, material in enumerate(self.config['scout']['target_materials'])}
+            best_prices = self.compute_best_prices(prices_data)
+            best_prices.sort(key=lambda item: materials.get(item['material'], len(materials)))
+            return best_prices
         
-        return best_prices
+        revision = self.store.get_revision(), id(self.config)
+        if self.best_prices_cache and self.best_prices_cache['revision'] == revision:
+            return self.best_prices_cache['result']
+        
+        snapshot = pd.DataFrame(self.get_latest_snapshot())
+        result = self.compute_best_prices(snapshot) if not snapshot.empty else []
+        self.best_prices_cache = {'revision': revision, 'result': result}
+        return result
+
+    def get_latest_snapshot(self):
+        """Последние цены по отслеживаемым материалам и поставщикам"""
+        self.refresh_config()
+        return self.store.get_latest_snapshot(
+            set(self.config['scout']['target_materials']),
+            set(self.config['scout']['suppliers'])
+        )
+
+    def compute_best_prices(self, prices):
+        """Расчет лучших цен: столбцовые данные (DataFrame) считаются векторно через NumPy/pandas"""
+        # Порог подобран по benchmarks/bench_best_prices.py. Для списка записей от парсера
+        # построчный путь не медленнее: основное время уходит на сборку all_options
+        if isinstance(prices, pd.DataFrame):
+            analytics = self.config['scout'].get('analytics', {})
+            if len(prices) >= analytics.get('vectorize_min_rows', 200):
+                return find_best_prices_vectorized(prices)
+            prices = prices.to_dict('records')
+        return find_best_prices_python(prices)
 
     def get_price_history(self, material, days=30):
-        """Получение истории цен по материалу"""
-        if not os.path.exists(self.data_file):
+        """Получение истории цен по материалу за последние days дней"""
+        return self.store.get_history(material, days)
+
+    def get_price_history_df(self, material, days=30, columns=('supplier', 'price', 'date')):
+        """История цен в DataFrame (из Parquet-архива, если он включен)"""
+        if self.archive:
+            return self.archive.read_history(material, days, columns)
+        
+        history = pd.DataFrame(self.store.get_history(material, days), columns=['supplier', 'price', 'date'])
+        return history[list(columns)]
+
+    def get_price_summary(self, material, days=30):
+        """Сводка по поставщикам: мин, макс, текущая цена и число записей
+
+        Для окон из storage.rolling_windows сводка берется из заранее
+        посчитанной скользящей статистики (окно по календарным дням).
+        """
+        if days in self.store.rolling_windows:
+            return self.store.get_rolling_stats(material, days)
+        
+        if not self.archive:
+            return self.store.get_supplier_summary(material, days)
+        
+        # Векторная агрегация по колоночным данным
+        history = self.get_price_history_df(material, days)
+        if history.empty:
             return []
         
-        history = []
-        with open(self.data_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['material'] == material:
-                    history.append({
-                        'supplier': row['supplier'],
-                        'price': float(row['price']),
-                        'date': row['date']
-                    })
-        
-        return history
\ No newline at end of file
+        stats = history.groupby('supplier', sort=True)['price'].agg(
+            min_price='min', max_price='max', count='count', last_price='last'
+        )
+        return stats.reset_index().to_dict('records')
@@ -0,0 +1,633 @@
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+PRICE_COLUMNS = ['material', 'supplier', 'price', 'product_name', 'url', 'city', 'date', 'ts', 'day']
+
+INSERT_PRICE_SQL = f"INSERT INTO prices ({', '.join(PRICE_COLUMNS)}) VALUES ({', '.join('?' * len(PRICE_COLUMNS))})"
+
+JOURNAL_COLUMNS = ['run_id', 'status'] + PRICE_COLUMNS
+
+SCHEMA_VERSION = 5
+
+# Окна скользящей статистики по умолчанию, дней
+ROLLING_WINDOWS = (1, 7, 30)
+
+
+def parse_timestamp(value):
+    """Приведение даты к datetime с точностью до секунды
+
+    В истории встречаются даты с микросекундами и без, поэтому все значения
+    нормализуются к одному виду перед записью.
+    """
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0)
+    try:
+        return datetime.fromisoformat(str(value).strip()).replace(microsecond=0)
+    except ValueError:
+        return None
+
+
+def get_window_start(days):
+    """Начало окна в days дней от текущего момента"""
+    return (datetime.now() - timedelta(days=days)).replace(microsecond=0)
+
+
+class PriceStore:
+    """Хранилище истории цен на SQLite (WAL, индексы, пакетная запись)"""
+
+    def __init__(self, db_path="data/prices.db", rolling_windows=ROLLING_WINDOWS):
+        self.db_path = db_path
+        self.rolling_windows = tuple(rolling_windows)
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_schema()
+
+    def create_schema(self):
+        """Создание таблиц и индексов"""
+        with self.lock, self.conn:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            table_exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prices'"
+            ).fetchone()
+
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS prices (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    material TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    product_name TEXT,
+                    url TEXT,
+                    city TEXT,
+                    date TEXT NOT NULL,
+                    ts INTEGER,
+                    day TEXT
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                -- Последняя известная цена каждой пары (материал, поставщик)
+                CREATE TABLE IF NOT EXISTS latest_prices (
+                    material TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    price_id INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    PRIMARY KEY (material, supplier)
+                );
+                -- Журнал запусков парсинга: результат каждой обработанной пары
+                CREATE TABLE IF NOT EXISTS crawl_runs (
+                    run_id TEXT PRIMARY KEY,
+                    started TEXT NOT NULL,
+                    finished TEXT
+                );
+                CREATE TABLE IF NOT EXISTS crawl_journal (
+                    run_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    material TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    price REAL,
+                    product_name TEXT,
+                    url TEXT,
+                    city TEXT,
+                    date TEXT,
+                    ts INTEGER,
+                    day TEXT,
+                    PRIMARY KEY (run_id, supplier, material)
+                );
+                -- Итоги завершенных запусков по магазинам
+                CREATE TABLE IF NOT EXISTS crawl_stats (
+                    run_id TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    attempted INTEGER NOT NULL,
+                    found INTEGER NOT NULL,
+                    failed INTEGER NOT NULL,
+                    PRIMARY KEY (run_id, supplier)
+                );
+                -- Дневные агрегаты по парам: обновляются при каждой записи цен
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    material TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    min_price REAL NOT NULL,
+                    max_price REAL NOT NULL,
+                    sum_price REAL NOT NULL,
+                    sum_square_price REAL NOT NULL DEFAULT 0,
+                    count INTEGER NOT NULL,
+                    first_ts INTEGER NOT NULL,
+                    first_price REAL NOT NULL,
+                    last_ts INTEGER NOT NULL,
+                    last_price REAL NOT NULL,
+                    PRIMARY KEY (material, supplier, day)
+                );
+                -- Скользящая статистика за окна в window_days дней на дату as_of
+                CREATE TABLE IF NOT EXISTS rolling_stats (
+                    material TEXT NOT NULL,
+                    supplier TEXT NOT NULL,
+                    window_days INTEGER NOT NULL,
+                    as_of TEXT NOT NULL,
+                    min_price REAL NOT NULL,
+                    max_price REAL NOT NULL,
+                    mean_price REAL NOT NULL,
+                    first_price REAL NOT NULL,
+                    last_price REAL NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (material, window_days, supplier)
+                );
+            """)
+
+            if table_exists and version < 1:
+                self.migrate_timestamps()
+            if table_exists and version < 2:
+                self.refresh_latest(0)
+            if table_exists and version < 5:
+                columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(daily_stats)")]
+                if 'sum_square_price' not in columns:
+                    self.conn.execute("ALTER TABLE daily_stats ADD COLUMN sum_square_price REAL NOT NULL DEFAULT 0")
+                # Дневные агрегаты пересчитываются целиком, скользящая статистика
+                # досчитается при первом обращении
+                self.conn.execute("DELETE FROM daily_stats")
+                self.refresh_daily(0)
+
+            # Индекс по дням: запрос за N дней читает только разделы этих дней,
+            # его стоимость зависит от размера окна, а не всей истории
+            self.conn.executescript(f"""
+                DROP INDEX IF EXISTS idx_prices_material_supplier_date;
+                CREATE INDEX IF NOT EXISTS idx_prices_material_day
+                    ON prices (material, day, supplier);
+                CREATE INDEX IF NOT EXISTS idx_prices_pair_ts
+                    ON prices (material, supplier, ts);
+                CREATE INDEX IF NOT EXISTS idx_daily_stats_day
+                    ON daily_stats (day);
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+
+    def migrate_timestamps(self):
+        """Заполнение ts/day и нормализация дат в базе старого формата"""
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(prices)")]
+        for column, column_type in (('ts', 'INTEGER'), ('day', 'TEXT')):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE prices ADD COLUMN {column} {column_type}")
+
+        updates = []
+        for row in self.conn.execute("SELECT id, date FROM prices").fetchall():
+            moment = parse_timestamp(row['date']) or datetime.now().replace(microsecond=0)
+            updates.append((
+                moment.strftime('%Y-%m-%d %H:%M:%S'),
+                int(moment.timestamp()),
+                moment.date().isoformat(),
+                row['id']
+            ))
+        self.conn.executemany("UPDATE prices SET date = ?, ts = ?, day = ? WHERE id = ?", updates)
+
+    def refresh_latest(self, after_id):
+        """Обновление последних цен по строкам, добавленным после after_id"""
+        self.conn.execute("""
+            INSERT INTO latest_prices (material, supplier, price_id, ts)
+            SELECT material, supplier, id, ts FROM prices WHERE id > ? ORDER BY id
+            ON CONFLICT (material, supplier) DO UPDATE
+                SET price_id = excluded.price_id, ts = excluded.ts
+                WHERE excluded.ts >= latest_prices.ts
+        """, (after_id,))
+
+    def refresh_daily(self, after_id):
+        """Добавление строк после after_id в дневные агрегаты
+
+        Новые строки сворачиваются по (материал, поставщик, день) и сливаются
+        с уже посчитанными днями: суммы и счетчики складываются, первая и
+        последняя цена выбираются по времени.
+        """
+        self.conn.execute("""
+            INSERT INTO daily_stats (material, supplier, day, min_price, max_price, sum_price, sum_square_price,
+                                     count, first_ts, first_price, last_ts, last_price)
+            SELECT material, supplier, day, MIN(price), MAX(price), SUM(price), SUM(price * price), COUNT(*),
+                   MIN(ts), MAX(first_price), MAX(ts), MAX(last_price)
+            FROM (
+                SELECT material, supplier, day, price, ts,
+                       FIRST_VALUE(price) OVER (PARTITION BY material, supplier, day ORDER BY ts, id) AS first_price,
+                       FIRST_VALUE(price) OVER (PARTITION BY material, supplier, day ORDER BY ts DESC, id DESC) AS last_price
+                -- NOT INDEXED: поиск по id вместо обхода индекса по парам
+                FROM prices NOT INDEXED
+                WHERE id > ?
+            )
+            -- WHERE обязателен: без него SQLite принимает ON CONFLICT за часть JOIN
+            WHERE 1 = 1
+            GROUP BY material, supplier, day
+            ON CONFLICT (material, supplier, day) DO UPDATE SET
+                min_price = MIN(daily_stats.min_price, excluded.min_price),
+                max_price = MAX(daily_stats.max_price, excluded.max_price),
+                sum_price = daily_stats.sum_price + excluded.sum_price,
+                sum_square_price = daily_stats.sum_square_price + excluded.sum_square_price,
+                count = daily_stats.count + excluded.count,
+                first_price = CASE WHEN excluded.first_ts < daily_stats.first_ts
+                                   THEN excluded.first_price ELSE daily_stats.first_price END,
+                first_ts = MIN(daily_stats.first_ts, excluded.first_ts),
+                last_price = CASE WHEN excluded.last_ts >= daily_stats.last_ts
+                                  THEN excluded.last_price ELSE daily_stats.last_price END,
+                last_ts = MAX(daily_stats.last_ts, excluded.last_ts)
+        """, (after_id,))
+
+    def refresh_rolling(self, materials, today=None):
+        """Пересчет скользящей статистики материалов по дневным агрегатам
+
+        На пару приходится не больше max(окно) дневных строк, поэтому пересчет
+        не зависит от объема истории.
+        """
+        today = today or datetime.now().date()
+        placeholders = ', '.join('?' * len(materials))
+        starts = {
+            window_days: (today - timedelta(days=window_days - 1)).isoformat()
+            for window_days in self.rolling_windows
+        }
+        days = self.conn.execute(f"""
+            SELECT material, supplier, day, min_price, max_price, sum_price, count, first_price, last_price
+            FROM daily_stats
+            WHERE material IN ({placeholders}) AND day >= ?
+            ORDER BY material, supplier, day
+        """, list(materials) + [min(starts.values())]).fetchall()
+
+        pairs = {}
+        for row in days:
+            pairs.setdefault((row['material'], row['supplier']), []).append(row)
+
+        rows = []
+        for (material, supplier), pair_days in pairs.items():
+            for window_days, start in starts.items():
+                window = [row for row in pair_days if row['day'] >= start]
+                if not window:
+                    continue
+                count = sum(row['count'] for row in window)
+                rows.append((
+                    material, supplier, window_days, today.isoformat(),
+                    min(row['min_price'] for row in window),
+                    max(row['max_price'] for row in window),
+                    sum(row['sum_price'] for row in window) / count,
+                    window[0]['first_price'],
+                    window[-1]['last_price'],
+                    count
+                ))
+
+        self.conn.execute(f"DELETE FROM rolling_stats WHERE material IN ({placeholders})", list(materials))
+        self.conn.executemany(
+            "INSERT INTO rolling_stats (material, supplier, window_days, as_of, min_price, max_price, "
+            "mean_price, first_price, last_price, count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def refresh_aggregates(self, after_id):
+        """Последние цены, дневные агрегаты и скользящая статистика по строкам после after_id"""
+        self.refresh_latest(after_id)
+        self.refresh_daily(after_id)
+        materials = [row[0] for row in self.conn.execute(
+            "SELECT DISTINCT material FROM prices NOT INDEXED WHERE id > ?", (after_id,)
+        )]
+        # Ограничение SQLite на число параметров запроса
+        for start in range(0, len(materials), 500):
+            self.refresh_rolling(materials[start:start + 500])
+
+    def get_last_id(self):
+        """Номер последней записи (без блокировки, вызывается внутри транзакции)"""
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM prices").fetchone()[0]
+
+    def make_rows(self, prices_data):
+        """Преобразование записей о ценах в строки таблицы"""
+        rows = []
+        for item in prices_data:
+            moment = parse_timestamp(item.get('date', '')) or datetime.now().replace(microsecond=0)
+            rows.append((
+                item['material'],
+                item['supplier'],
+                float(item['price']),
+                item.get('product_name', ''),
+                item.get('url', ''),
+                item.get('city', ''),
+                moment.strftime('%Y-%m-%d %H:%M:%S'),
+                int(moment.timestamp()),
+                moment.date().isoformat()
+            ))
+        return rows
+
+    def insert_prices(self, prices_data):
+        """Запись пачки цен одной транзакцией"""
+        rows = self.make_rows(prices_data)
+        with self.lock, self.conn:
+            last_id = self.get_last_id()
+            self.conn.executemany(INSERT_PRICE_SQL, rows)
+            self.refresh_aggregates(last_id)
+        return len(rows)
+
+    def delete_prices_by_url(self, url_prefix):
+        """Удаление записей с адресом, начинающимся с url_prefix, и пересчет производных таблиц"""
+        with self.lock, self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM prices WHERE url LIKE ? || '%'", (url_prefix,)
+            ).rowcount
+            if deleted:
+                self.conn.execute("DELETE FROM latest_prices")
+                self.conn.execute("DELETE FROM daily_stats")
+                self.conn.execute("DELETE FROM rolling_stats")
+                self.refresh_aggregates(0)
+        return deleted
+
+    def import_csv(self, csv_path):
+        """Однократный перенос старого historical_prices.csv в базу"""
+        if not os.path.exists(csv_path) or self.get_meta('csv_imported'):
+            return 0
+
+        prices_data = []
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)  # заголовок
+
+            for row in reader:
+                # В старом файле встречаются строки двух форматов:
+                # material,supplier,price,date и material,supplier,price,product_name,url,date
+                if len(row) == 4:
+                    material, supplier, price, date = row
+                    product_name, url = '', ''
+                elif len(row) == 6:
+                    material, supplier, price, product_name, url, date = row
+                else:
+                    continue
+
+                if not parse_timestamp(date):
+                    continue
+
+                try:
+                    prices_data.append({
+                        'material': material,
+                        'supplier': supplier,
+                        'price': float(price),
+                        'product_name': product_name,
+                        'url': url,
+                        'date': date
+                    })
+                except ValueError:
+                    continue
+
+        # Данные и отметка об импорте пишутся в одной транзакции, чтобы не импортировать дважды
+        with self.lock, self.conn:
+            last_id = self.get_last_id()
+            self.conn.executemany(INSERT_PRICE_SQL, self.make_rows(prices_data))
+            self.refresh_aggregates(last_id)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                ('csv_imported', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+        print(f"📥 Импортировано из {csv_path}: {len(prices_data)} записей")
+        return len(prices_data)
+
+    def get_window_filter(self, days):
+        """Условие на окно в days дней: сначала по разделам-дням, затем точно по времени"""
+        if days is None:
+            return "", []
+        start = get_window_start(days)
+        return " AND day >= ? AND ts >= ?", [start.date().isoformat(), int(start.timestamp())]
+
+    def get_history(self, material, days=None, supplier=None):
+        """История цен по материалу за последние days дней (по индексу)"""
+        window_sql, params = self.get_window_filter(days)
+        query = f"SELECT supplier, price, ts FROM prices WHERE material = ?{window_sql}"
+        params = [material] + params
+        if supplier:
+            query += " AND supplier = ?"
+            params.append(supplier)
+        query += " ORDER BY ts, id"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [
+            {'supplier': row['supplier'], 'price': row['price'], 'date': datetime.fromtimestamp(row['ts'])}
+            for row in rows
+        ]
+
+    def get_supplier_summary(self, material, days=None):
+        """Мин/макс/последняя цена и число записей по каждому поставщику за окно"""
+        window_sql, window_params = self.get_window_filter(days)
+        with self.lock:
+            rows = self.conn.execute(f"""
+                SELECT supplier,
+                       MIN(price) AS min_price,
+                       MAX(price) AS max_price,
+                       COUNT(*) AS count,
+                       (SELECT p2.price FROM prices p2
+                        WHERE p2.material = p.material AND p2.supplier = p.supplier
+                        ORDER BY p2.ts DESC, p2.id DESC LIMIT 1) AS last_price
+                FROM prices p
+                WHERE material = ?{window_sql}
+                GROUP BY supplier
+                ORDER BY supplier
+            """, [material] + window_params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_rolling_stats(self, material, window_days=30):
+        """Скользящая статистика по поставщикам материала за окно (готовые строки)
+
+        Если статистика посчитана в прошлые дни, окно сдвигается пересчетом
+        по дневным агрегатам этого материала.
+        """
+        if window_days not in self.rolling_windows:
+            raise ValueError(f"окно {window_days} дней не входит в {self.rolling_windows}")
+
+        query = """
+            SELECT supplier, as_of, min_price, max_price, mean_price, first_price, last_price, count
+            FROM rolling_stats
+            WHERE material = ? AND window_days = ?
+            ORDER BY supplier
+        """
+        today = datetime.now().date()
+        with self.lock:
+            rows = self.conn.execute(query, (material, window_days)).fetchall()
+            if not rows or rows[0]['as_of'] != today.isoformat():
+                with self.conn:
+                    self.refresh_rolling([material], today)
+                rows = self.conn.execute(query, (material, window_days)).fetchall()
+
+        stats = []
+        for row in rows:
+            item = dict(row)
+            del item['as_of']
+            item['mean_price'] = round(item['mean_price'], 2)
+            # Изменение цены за окно: последняя цена относительно первой
+            change = (item['last_price'] - item['first_price']) / item['first_price'] if item['first_price'] else 0.0
+            item['pct_change'] = round(change * 100, 2)
+            stats.append(item)
+        return stats
+
+    def get_revision(self):
+        """Версия данных: меняется при каждой записи новых цен"""
+        with self.lock:
+            return self.get_last_id()
+
+    def get_latest_snapshot(self, materials=None, suppliers=None):
+        """Последняя цена каждой пары (материал, поставщик)"""
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT p.material, p.supplier, p.price, p.product_name, p.url, p.city, p.date, p.ts
+                FROM latest_prices l
+                JOIN prices p ON p.id = l.price_id
+                ORDER BY p.id
+            """).fetchall()
+
+        snapshot = [dict(row) for row in rows]
+        if materials is not None:
+            snapshot = [item for item in snapshot if item['material'] in materials]
+        if suppliers is not None:
+            snapshot = [item for item in snapshot if item['supplier'] in suppliers]
+        return snapshot
+
+    def get_price_volatility(self, days=30):
+        """Коэффициент вариации цены каждой пары за последние days дней
+
+        Считается по дневным агрегатам (окно по календарным дням), история
+        цен не читается.
+        """
+        start = get_window_start(days).date().isoformat()
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT material, supplier, SUM(count) AS count,
+                       SUM(sum_price) / SUM(count) AS mean,
+                       SUM(sum_square_price) / SUM(count) AS mean_square
+                FROM daily_stats
+                WHERE day >= ?
+                GROUP BY material, supplier
+            """, (start,)).fetchall()
+
+        volatility = {}
+        for row in rows:
+            if row['count'] < 2 or not row['mean']:
+                continue
+            variance = max(row['mean_square'] - row['mean'] ** 2, 0.0)
+            volatility[(row['material'], row['supplier'])] = variance ** 0.5 / row['mean']
+        return volatility
+
+    def iter_prices(self, batch_size=10000):
+        """Обход всей истории пачками (для выгрузки)"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, material, supplier, price, product_name, url, city, date "
+                    "FROM prices WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            yield [dict(row) for row in rows]
+
+    def start_run(self, run_id, started):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO crawl_runs (run_id, started) VALUES (?, ?)", (run_id, started))
+
+    def get_unfinished_runs(self):
+        """Прерванные запуски, от новых к старым"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT run_id, started FROM crawl_runs WHERE finished IS NULL ORDER BY started DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def write_journal(self, run_id, entries):
+        """Запись результатов пар в журнал запуска
+
+        entries - список (статус, материал, поставщик, запись о цене или None).
+        Повторная обработка пары заменяет прежний результат.
+        """
+        rows = []
+        for status, material, supplier, record in entries:
+            if record:
+                rows.append((run_id, status) + self.make_rows([record])[0])
+            else:
+                rows.append((run_id, status, material, supplier) + (None,) * (len(PRICE_COLUMNS) - 2))
+        
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO crawl_journal ({', '.join(JOURNAL_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(JOURNAL_COLUMNS))})",
+                rows
+            )
+
+    def get_journal(self, run_id):
+        """Результаты пар, уже обработанных в запуске"""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(JOURNAL_COLUMNS[1:])} FROM crawl_journal WHERE run_id = ? ORDER BY rowid",
+                (run_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def compact_run(self, run_id, finished):
+        """Перенос найденных цен запуска в историю и свертка журнала в итоги по магазинам
+
+        Все выполняется одной транзакцией: запуск либо завершен целиком,
+        либо остается незавершенным и может быть продолжен.
+        """
+        with self.lock, self.conn:
+            found = self.conn.execute(
+                f"SELECT {', '.join(PRICE_COLUMNS)} FROM crawl_journal "
+                "WHERE run_id = ? AND status = 'found' ORDER BY rowid",
+                (run_id,)
+            ).fetchall()
+            
+            last_id = self.get_last_id()
+            self.conn.executemany(INSERT_PRICE_SQL, [tuple(row) for row in found])
+            self.refresh_aggregates(last_id)
+            
+            self.conn.execute("""
+                INSERT OR REPLACE INTO crawl_stats (run_id, supplier, attempted, found, failed)
+                SELECT run_id, supplier, COUNT(*),
+                       SUM(status = 'found'), SUM(status = 'failed')
+                FROM crawl_journal
+                WHERE run_id = ?
+                GROUP BY supplier
+            """, (run_id,))
+            self.conn.execute("DELETE FROM crawl_journal WHERE run_id = ?", (run_id,))
+            self.conn.execute("UPDATE crawl_runs SET finished = ? WHERE run_id = ?", (finished, run_id))
+        
+        return [dict(row) for row in found]
+
+    def get_crawl_stats(self, days=None):
+        """Итоги завершенных запусков по магазинам: {магазин: attempted/found/failed}"""
+        query = """
+            SELECT s.supplier, SUM(s.attempted) AS attempted,
+                   SUM(s.found) AS found, SUM(s.failed) AS failed
+            FROM crawl_stats s
+            JOIN crawl_runs r ON r.run_id = s.run_id
+        """
+        params = []
+        if days is not None:
+            query += " WHERE r.started >= ?"
+            params.append(get_window_start(days).strftime('%Y-%m-%d %H:%M:%S'))
+        query += " GROUP BY s.supplier"
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return {row['supplier']: dict(row) for row in rows}
+
+    def get_stats_revision(self):
+        """Версия итогов запусков: меняется при завершении каждого запуска"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM crawl_runs WHERE finished IS NOT NULL").fetchone()[0]
+
+    def get_meta(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Ведро токенов: ограничение частоты запросов к одному хосту"""
+
+    def __init__(self, requests_per_minute, burst=1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Резервирование токена, возвращает время ожидания в секундах"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            # Токен забирается сразу, поэтому очередь может уйти в минус:
+            # следующий запрос подождет дольше, порядок сохраняется
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class CrawlScheduler:
+    """Планировщик слотов для запросов: отдельное ведро токенов на каждый домен"""
+
+    def __init__(self, config):
+        self.config = config
+        self.buckets = {}
+        self.supplier_hosts = {}
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+        settings = config['scout'].get('parser_settings', {})
+        # По умолчанию лимит выводится из старой задержки между запросами
+        default_rpm = 60.0 / max(settings.get('delay_between_requests', 1), 0.001)
+
+        for supplier_name, supplier_config in config['scout']['suppliers'].items():
+            host = urlparse(supplier_config['base_url']).netloc
+            self.supplier_hosts[supplier_name] = host
+
+            if host not in self.buckets:
+                rate_limit = supplier_config.get('rate_limit', {})
+                self.buckets[host] = TokenBucket(
+                    rate_limit.get('requests_per_minute', default_rpm),
+                    rate_limit.get('burst', 1)
+                )
+
+    def get_host(self, supplier_name):
+        """Домен магазина"""
+        return self.supplier_hosts[supplier_name]
+
+    def acquire(self, supplier_name):
+        """Блокирующее ожидание слота для запроса к магазину"""
+        wait = self.buckets[self.get_host(supplier_name)].reserve()
+        if wait > 0:
+            time.sleep(wait)
+        self.record(supplier_name, queue_time=wait)
+        return wait
+
+    async def acquire_async(self, supplier_name):
+        """Ожидание слота без блокировки цикла событий"""
+        wait = self.buckets[self.get_host(supplier_name)].reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.record(supplier_name, queue_time=wait)
+        return wait
+
+    def record(self, supplier_name, queue_time=0.0, network_time=None):
+        """Учет времени ожидания в очереди и времени в сети"""
+        host = self.get_host(supplier_name)
+        with self.stats_lock:
+            host_stats = self.stats.setdefault(host, {
+                'requests': 0,
+                'queue_time': 0.0,
+                'network_time': 0.0
+            })
+            if network_time is None:
+                host_stats['requests'] += 1
+                host_stats['queue_time'] += queue_time
+            else:
+                host_stats['network_time'] += network_time
+
+    def reset_stats(self):
+        """Сброс статистики перед новым запуском"""
+        with self.stats_lock:
+            self.stats = {}
+
+    def get_stats(self):
+        """Статистика по доменам: очередь против сети"""
+        with self.stats_lock:
+            result = {}
+            for host, host_stats in self.stats.items():
+                requests = host_stats['requests'] or 1
+                result[host] = {
+                    'requests': host_stats['requests'],
+                    'queue_time': round(host_stats['queue_time'], 2),
+                    'network_time': round(host_stats['network_time'], 2),
+                    'avg_queue_time': round(host_stats['queue_time'] / requests, 3),
+                    'avg_network_time': round(host_stats['network_time'] / requests, 3)
+                }
+            return result
+
+    def print_stats(self):
+        """Вывод статистики планировщика"""
+        stats = self.get_stats()
+        if not stats:
+            return
+
+        print("\n⏱️  Статистика запросов (очередь / сеть):")
+        for host, host_stats in stats.items():
+            print(f"   • {host}: {host_stats['requests']} запр., "
+                  f"очередь {host_stats['queue_time']} с (ср. {host_stats['avg_queue_time']} с), "
+                  f"сеть {host_stats['network_time']} с (ср. {host_stats['avg_network_time']} с)")
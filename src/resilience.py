@@ -0,0 +1,76 @@
+import random
+import threading
+import requests
+
+
+# HTTP-коды, при которых запрос имеет смысл повторить
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_transient_error(error):
+    """Проверка, является ли ошибка временной (сеть, таймаут, перегрузка сервера)"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+
+class RetryPolicy:
+    """Повторы с экспоненциальной задержкой"""
+
+    def __init__(self, settings):
+        self.retry_attempts = settings.get('retry_attempts', 0)
+        self.backoff_base = settings.get('retry_backoff', 1.0)
+        self.backoff_max = settings.get('retry_backoff_max', 30.0)
+
+    def get_delay(self, retry_number, error=None):
+        """Задержка перед повтором номер retry_number (начиная с 1)"""
+        # Сервер сам подсказал, сколько ждать
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            retry_after = error.response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+
+        delay = self.backoff_base * (2 ** (retry_number - 1))
+        # Небольшой разброс, чтобы повторы к разным магазинам не совпадали
+        return min(delay + random.uniform(0, self.backoff_base), self.backoff_max)
+
+    def should_retry(self, retries_done, error):
+        """Нужно ли повторять запрос после ошибки"""
+        return retries_done < self.retry_attempts and is_transient_error(error)
+
+
+class CircuitBreaker:
+    """Предохранитель: после N ошибок подряд магазин пропускается до конца запуска"""
+
+    def __init__(self, threshold=3):
+        self.threshold = threshold
+        self.failures = {}
+        self.opened = set()
+        self.lock = threading.Lock()
+
+    def is_open(self, supplier_name):
+        """Магазин отключен в текущем запуске"""
+        with self.lock:
+            return supplier_name in self.opened
+
+    def record_success(self, supplier_name):
+        """Успешный запрос сбрасывает счетчик ошибок"""
+        with self.lock:
+            self.failures[supplier_name] = 0
+
+    def record_failure(self, supplier_name):
+        """Учет ошибки, возвращает True если предохранитель сработал"""
+        with self.lock:
+            self.failures[supplier_name] = self.failures.get(supplier_name, 0) + 1
+            if self.threshold and self.failures[supplier_name] >= self.threshold:
+                self.opened.add(supplier_name)
+                return True
+            return False
+
+    def reset(self):
+        """Сброс состояния перед новым запуском"""
+        with self.lock:
+            self.failures = {}
+            self.opened = set()
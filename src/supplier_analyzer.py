@@ -1,45 +1,138 @@
-import yaml
-from datetime import datetime
+import time
+import pandas as pd
+from .config import get_config
+from .price_store import PriceStore
+
+# Вклад метрик в рейтинг надежности, если в config.yaml не задано иное
+DEFAULT_WEIGHTS = {
+    'success_rate': 0.35,
+    'competitiveness': 0.3,
+    'stability': 0.15,
+    'freshness': 0.2
+}
 
 class SupplierAnalyzer:
-    def __init__(self, config_path="config/config.yaml"):
+    """Рейтинг поставщиков по истории цен и итогам запусков парсинга
+
+    Метрики всех поставщиков считаются сразу, несколькими агрегирующими
+    запросами к хранилищу. Результат кэшируется до появления новых цен
+    или завершения очередного запуска.
+    """
+
+    def __init__(self, config_path="config/config.yaml", store=None):
         self.config_path = config_path
+        self.store = store or PriceStore("data/prices.db")
+        self.cache = None
+
+    def get_revision(self):
+        """Версия данных, от которых зависит рейтинг"""
+        return self.store.get_revision(), self.store.get_stats_revision(), id(get_config(self.config_path))
+
+    def analyze_all_suppliers(self):
+        """Рейтинг всех поставщиков из config.yaml, от лучшего к худшему"""
+        revision = self.get_revision()
+        if self.cache and self.cache['revision'] == revision:
+            return self.cache['result']
+
+        config = get_config(self.config_path)
+        scoring = config['scout'].get('supplier_scoring', {})
+        weights = dict(DEFAULT_WEIGHTS, **scoring.get('weights', {}))
+        days = scoring.get('window_days', 30)
+        max_age_hours = config['scout'].get('freshness', {}).get('default_max_age_hours', 24)
+
+        suppliers = config['scout']['suppliers']
+        materials = config['scout']['target_materials']
+        metrics = pd.DataFrame(index=pd.Index(list(suppliers), name='supplier'))
+
+        # Доля успешных запросов по итогам запусков за окно: запрос без ошибки
+        # успешен и тогда, когда товара в магазине нет
+        crawl_stats = pd.DataFrame.from_dict(self.store.get_crawl_stats(days), orient='index')
+        if not crawl_stats.empty:
+            attempted = crawl_stats['attempted'].where(crawl_stats['attempted'] > 0)
+            metrics['success_rate'] = (crawl_stats['attempted'] - crawl_stats['failed']) / attempted
+
+        # Конкурентность: отношение лучшей цены материала к цене поставщика, в среднем по материалам
+        snapshot = pd.DataFrame(self.store.get_latest_snapshot(set(materials), set(suppliers)))
+        metrics['materials_count'] = 0
+        if not snapshot.empty:
+            best = snapshot.groupby('material')['price'].transform('min')
+            snapshot['price_ratio'] = best / snapshot['price']
+            by_supplier = snapshot.groupby('supplier')
+            metrics['materials_count'] = by_supplier.size()
+            metrics['competitiveness'] = by_supplier['price_ratio'].mean()
+            metrics['age_hours'] = (time.time() - by_supplier['ts'].max()) / 3600
+            # Свежие данные - 1, дальше оценка падает обратно пропорционально возрасту
+            metrics['freshness'] = (max_age_hours / metrics['age_hours'].clip(lower=max_age_hours)).clip(upper=1)
+        metrics['materials_count'] = metrics['materials_count'].fillna(0).astype(int)
+
+        # Стабильность: 1 минус средний коэффициент вариации цен поставщика
+        volatility = pd.Series(self.store.get_price_volatility(days), dtype=float)
+        if not volatility.empty:
+            volatility.index.names = ['material', 'supplier']
+            volatility = volatility[volatility.index.get_level_values('material').isin(materials)]
+            metrics['stability'] = (1 - volatility.groupby(level='supplier').mean()).clip(lower=0)
+
+        metrics = metrics.reindex(columns=list(metrics.columns) + [
+            name for name in weights if name not in metrics.columns
+        ])
+        # Отсутствующие метрики не учитываются, веса остальных нормируются
+        values = metrics[list(weights)]
+        weight_row = pd.Series(weights)
+        weight_sum = values.notna().mul(weight_row).sum(axis=1)
+        score = values.fillna(0).mul(weight_row).sum(axis=1) / weight_sum.where(weight_sum > 0)
+        metrics['reliability_score'] = (score * 100).round(1)
+        metrics = metrics.sort_values('reliability_score', ascending=False, na_position='last')
+
+        result = []
+        for rank, (supplier_name, row) in enumerate(metrics.iterrows(), 1):
+            result.append(self.make_result(supplier_name, suppliers[supplier_name], row, rank))
+
+        self.cache = {'revision': revision, 'result': result}
+        return result
+
+    def make_result(self, supplier_name, supplier_data, row, rank):
+        """Строка рейтинга со статусом и рекомендацией"""
+        def get_value(name, digits=3):
+            value = row.get(name)
+            return None if pd.isna(value) else round(float(value), digits)
+
+        reliability_score = get_value('reliability_score', 1)
+        if reliability_score is None:
+            status = "Нет данных"
+            recommendation = "Запустите парсинг"
+        elif reliability_score >= 85:
+            status = "Высокая надежность"
+            recommendation = "Рекомендуется"
+        elif reliability_score >= 70:
+            status = "Средняя надежность"
+            recommendation = "Под контролем"
+        else:
+            status = "Требует проверки"
+            recommendation = "Осторожно"
+
+        return {
+            'supplier_name': supplier_name,
+            'rank': rank,
+            'materials_count': int(row['materials_count']),
+            'success_rate': get_value('success_rate'),
+            'competitiveness': get_value('competitiveness'),
+            'stability': get_value('stability'),
+            'freshness': get_value('freshness'),
+            'age_hours': get_value('age_hours', 1),
+            'reliability_score': reliability_score,
+            'status': status,
+            'recommendation': recommendation,
+            'url': supplier_data['base_url']
+        }
 
     def analyze_supplier(self, supplier_name):
         """Анализ поставщика по имени"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                config = yaml.safe_load(file)
-            
-            suppliers = config['scout']['suppliers']
-            if supplier_name not in suppliers:
-                return None
-            
-            supplier_data = suppliers[supplier_name]
-            materials_count = len(supplier_data['materials'])
-            
-            # Расчет рейтинга на основе количества товаров и цен
-            reliability_score = min(80 + (materials_count * 2), 100)
-            
-            if reliability_score >= 85:
-                status = "Высокая надежность"
-                recommendation = "Рекомендуется"
-            elif reliability_score >= 70:
-                status = "Средняя надежность" 
-                recommendation = "Под контролем"
-            else:
-                status = "Требует проверки"
-                recommendation = "Осторожно"
-            
-            return {
-                'supplier_name': supplier_name,
-                'materials_count': materials_count,
-                'reliability_score': reliability_score,
-                'status': status,
-                'recommendation': recommendation,
-                'url': supplier_data['url']
-            }
-            
+            for result in self.analyze_all_suppliers():
+                if result['supplier_name'] == supplier_name:
+                    return result
+            return None
+
         except Exception as e:
             print(f"Ошибка анализа поставщика: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,222 @@
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+
+# Кириллические буквы и похожие на них латинские, которые встречаются в названиях (M300, C8)
+LOOKALIKES = {
+    'а': 'a', 'в': 'b', 'с': 'c', 'е': 'eё', 'н': 'h', 'к': 'k',
+    'м': 'm', 'о': 'o', 'р': 'p', 'т': 't', 'х': 'x', 'у': 'y'
+}
+
+TO_CYRILLIC = str.maketrans({
+    latin: cyrillic for cyrillic, latins in LOOKALIKES.items() for latin in latins
+})
+
+# Числа и слова - отдельные токены, поэтому 12мм и 12 мм совпадают
+LETTERS = r'[^\W\d_]'
+WORD_RE = re.compile(rf'\d+|{LETTERS}+')
+
+# Окончания для грубого стемминга, от длинных к коротким
+ENDINGS = sorted([
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю',
+    'ов', 'ев', 'ах', 'ях', 'ам', 'ям', 'ом', 'ем',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь'
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 3
+
+# Слова в названии, по которым товар считается не тем, что искали
+EXCLUDE_WORDS = ['аксессуар', 'инструмент', 'кисть', 'валик', 'перчатк']
+
+
+def normalize_text(text):
+    """Нижний регистр, е вместо ё, кириллица вместо похожей латиницы"""
+    return text.lower().translate(TO_CYRILLIC)
+
+
+def make_pattern(term):
+    """Регулярное выражение для основы: похожие латинские буквы и ё допускаются в тексте"""
+    return ''.join(
+        f'[{char}{LOOKALIKES[char]}]' if char in LOOKALIKES else re.escape(char)
+        for char in term
+    )
+
+
+def stem_word(word):
+    """Отбрасывание падежного окончания (основа не короче MIN_STEM_LENGTH)"""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def get_terms(text):
+    """Основы слов текста в порядке появления (без повторов)"""
+    terms = []
+    for word in WORD_RE.findall(normalize_text(text)):
+        term = stem_word(word)
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def is_exact_term(term):
+    """Числа и короткие слова (мм, м) сравниваются целиком, остальное - по основе"""
+    return term.isdigit() or len(term) < MIN_STEM_LENGTH
+
+
+class TextMatcher:
+    """Поиск фраз (названий материалов) в тексте одним проходом регулярного выражения
+
+    Из основ всех слов всех фраз и слов-исключений собирается одно регулярное
+    выражение. Проход по нормализованному тексту возвращает найденные основы,
+    после чего совпадение с каждой фразой считается по множествам.
+    """
+
+    def __init__(self, phrases, exclude_words=()):
+        self.exclude_words = [normalize_text(word) for word in exclude_words]
+        self.phrase_terms = {}
+        self.lock = threading.Lock()
+        for phrase in phrases:
+            self.phrase_terms[phrase] = get_terms(phrase)
+        self.compile()
+
+    def compile(self):
+        """Сборка общего регулярного выражения по текущему набору фраз"""
+        vocabulary = sorted({term for terms in self.phrase_terms.values() for term in terms}, key=len, reverse=True)
+        numbers = [term for term in vocabulary if term.isdigit()]
+        short_words = [term for term in vocabulary if is_exact_term(term) and not term.isdigit()]
+        prefixes = [term for term in vocabulary if not is_exact_term(term)]
+
+        # Границы токенов - смена буквы на цифру и обратно, а не только пробелы
+        alternatives = []
+        if self.exclude_words:
+            # Исключение ищется и внутри слова: электроинструмент
+            alternatives.append(f"(?P<exclude>{'|'.join(map(make_pattern, self.exclude_words))})")
+        if numbers:
+            alternatives.append(rf"(?<!\d)(?P<number>{'|'.join(numbers)})(?!\d)")
+        words = []
+        if short_words:
+            words.append(rf"(?P<short>{'|'.join(map(make_pattern, short_words))})(?!{LETTERS})")
+        if prefixes:
+            words.append(rf"(?P<prefix>{'|'.join(map(make_pattern, prefixes))}){LETTERS}*")
+        if words:
+            alternatives.append(rf"(?<!{LETTERS})(?:{'|'.join(words)})")
+
+        pattern = '|'.join(alternatives) or r'(?!)'
+        self.pattern = re.compile(pattern)
+
+    def add_phrase(self, phrase):
+        """Добавление фразы, которой не было при создании (например, произвольного запроса)"""
+        with self.lock:
+            if phrase not in self.phrase_terms:
+                self.phrase_terms[phrase] = get_terms(phrase)
+                self.compile()
+        return self.phrase_terms[phrase]
+
+    def get_phrase_terms(self, phrase):
+        """Основы слов фразы (новая фраза добавляется в выражение)"""
+        if phrase in self.phrase_terms:
+            return self.phrase_terms[phrase]
+        return self.add_phrase(phrase)
+
+    def scan(self, text):
+        """Найденные в тексте основы и признак слова-исключения"""
+        found = set()
+        excluded = False
+        # Похожие буквы учтены в выражении, поэтому текст целиком не перекодируется
+        for match in self.pattern.finditer(text.lower()):
+            # Группы взаимоисключающие, lastgroup - сработавшая ветка
+            if match.lastgroup == 'exclude':
+                excluded = True
+            else:
+                found.add(normalize_text(match.group(match.lastgroup)))
+        return found, excluded
+
+    def get_share(self, terms, found):
+        """Доля слов фразы, найденных в тексте"""
+        if not terms:
+            return 0.0
+        return sum(1 for term in terms if term in found) / len(terms)
+
+    def is_match(self, terms, found, min_share):
+        """Совпадение текста с фразой по найденным основам
+
+        Числа, единицы измерения и одиночные буквы сами по себе не совпадение:
+        нужно хотя бы одно слово фразы, и все числа фразы (марка, размер)
+        должны быть в тексте. Иначе "бетон M300" находил бы "Цемент М500"
+        по букве "м", а "арматура 12мм" - любой товар с "мм".
+        """
+        if not any(term in found for term in terms if not is_exact_term(term)):
+            return False
+        if not all(term in found for term in terms if term.isdigit()):
+            return False
+        return self.get_share(terms, found) >= min_share
+
+    def find_phrases(self, text, min_share=0.0):
+        """Фразы, найденные в тексте (не меньше min_share слов фразы)
+
+        Одних чисел и единиц измерения мало: нужно хотя бы одно слово фразы,
+        иначе предлог "с" находил бы "профнастил С8" в любом тексте.
+        """
+        found, _ = self.scan(text)
+        phrases = []
+        for phrase, terms in self.phrase_terms.items():
+            has_word = any(term in found and not is_exact_term(term) for term in terms)
+            if has_word and self.get_share(terms, found) >= min_share:
+                phrases.append(phrase)
+        return phrases
+
+    def match_series(self, texts, min_share=0.0):
+        """find_phrases для целого столбца текстов (pandas.Series) за один проход
+
+        Тексты склеиваются через перевод строки, и выражение проходит по ним
+        одним finditer; строка каждого совпадения определяется по смещениям.
+        Найденные основы собираются в булеву матрицу текст x основа, доли слов
+        фраз считаются по ее столбцам. Возвращает {фраза: булев Series}.
+        """
+        lowered = texts.fillna('').astype(str).str.lower()
+        lengths = lowered.str.len().to_numpy() + 1
+        offsets = np.cumsum(lengths) - lengths
+
+        vocabulary = sorted({term for terms in self.phrase_terms.values() for term in terms})
+        columns = {term: index for index, term in enumerate(vocabulary)}
+        normalized = {}
+        positions = []
+        codes = []
+        for match in self.pattern.finditer('\n'.join(lowered)):
+            group = match.lastgroup
+            if group == 'exclude':
+                continue
+            value = match.group(group)
+            if value not in normalized:
+                normalized[value] = columns.get(normalize_text(value))
+            if normalized[value] is not None:
+                positions.append(match.start())
+                codes.append(normalized[value])
+
+        matrix = np.zeros((len(lowered), len(vocabulary)), dtype=bool)
+        if positions:
+            rows = np.searchsorted(offsets, positions, side='right') - 1
+            matrix[rows, codes] = True
+
+        result = {}
+        for phrase, terms in self.phrase_terms.items():
+            hits = matrix[:, [columns[term] for term in terms]]
+            words = [columns[term] for term in terms if not is_exact_term(term)]
+            matched = matrix[:, words].any(axis=1)
+            if terms:
+                matched &= hits.sum(axis=1) / len(terms) >= min_share
+            result[phrase] = pd.Series(matched, index=texts.index)
+        return result
+
+    def is_relevant(self, text, phrase, min_share=0.3):
+        """Относится ли текст (название товара) к фразе (запросу)"""
+        terms = self.get_phrase_terms(phrase)
+        found, excluded = self.scan(text)
+        if excluded:
+            return False
+        return self.is_match(terms, found, min_share)
@@ -0,0 +1,156 @@
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from fake_useragent import UserAgent
+
+try:
+    import httpx
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Общие заголовки браузера; User-Agent подставляется в каждый запрос отдельно
+BASE_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class TransportResponse:
+    """Ответ сервера в одном виде для requests и httpx"""
+
+    def __init__(self, status_code, text, headers, url):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.url = url
+
+    def raise_for_status(self):
+        # requests.HTTPError, чтобы RetryPolicy одинаково разбирал ошибки обоих клиентов
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class HeaderRotator:
+    """Заголовки для каждого запроса с User-Agent, который меняется раз в N запросов
+
+    Заголовки собираются заново для каждого запроса, а не записываются в сессию,
+    поэтому транспорт можно использовать из нескольких потоков одновременно.
+    """
+
+    def __init__(self, rotate_every=5):
+        self.ua = UserAgent()
+        self.rotate_every = max(rotate_every, 1)
+        self.user_agent = self.ua.random
+        self.requests_made = 0
+        self.lock = threading.Lock()
+
+    def get_headers(self, extra=None):
+        with self.lock:
+            self.requests_made += 1
+            if self.requests_made % self.rotate_every == 0:
+                self.user_agent = self.ua.random
+            user_agent = self.user_agent
+
+        headers = dict(BASE_HEADERS, **{'User-Agent': user_agent})
+        headers.update(extra or {})
+        return headers
+
+
+def get_pool_sizes(config):
+    """Размер пула соединений для хоста каждого магазина"""
+    settings = config['scout'].get('parser_settings', {}).get('transport', {})
+    default_size = settings.get('pool_maxsize', 4)
+
+    pool_sizes = {}
+    for supplier_config in config['scout']['suppliers'].values():
+        host = urlparse(supplier_config['base_url']).netloc
+        size = supplier_config.get('connections', default_size)
+        pool_sizes[host] = max(pool_sizes.get(host, 0), size)
+    return pool_sizes
+
+
+class RequestsTransport:
+    """requests.Session с отдельным пулом keep-alive соединений для каждого магазина
+
+    У стандартного адаптера пулы хранятся только для 10 хостов. Когда магазинов
+    больше, старые пулы вытесняются, и соединения с TLS-рукопожатием
+    устанавливаются заново. Поэтому каждому хосту выделен свой адаптер.
+    """
+
+    name = 'requests (HTTP/1.1)'
+
+    def __init__(self, config):
+        self.session = requests.Session()
+        pool_sizes = get_pool_sizes(config)
+        for supplier_config in config['scout']['suppliers'].values():
+            parsed = urlparse(supplier_config['base_url'])
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_sizes[parsed.netloc], max_retries=0)
+            # Адаптер подбирается по самому длинному префиксу URL
+            self.session.mount(f"{parsed.scheme}://{parsed.netloc}/", adapter)
+
+    def get(self, url, headers, timeout):
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        return TransportResponse(response.status_code, response.text, response.headers, url)
+
+    def close(self):
+        self.session.close()
+
+
+class HttpxTransport:
+    """httpx с HTTP/2: запросы к магазину идут по одному соединению без повторных рукопожатий"""
+
+    name = 'httpx (HTTP/2)'
+
+    def __init__(self, config):
+        settings = config['scout'].get('parser_settings', {}).get('transport', {})
+        self.pool_sizes = get_pool_sizes(config)
+        self.default_size = settings.get('pool_maxsize', 4)
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def get_client(self, host):
+        """Клиент с ограничением соединений для хоста (создается при первом запросе)"""
+        with self.lock:
+            client = self.clients.get(host)
+            if client is None:
+                size = self.pool_sizes.get(host, self.default_size)
+                client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+                    follow_redirects=True
+                )
+                self.clients[host] = client
+            return client
+
+    def get(self, url, headers, timeout):
+        client = self.get_client(urlparse(url).netloc)
+        try:
+            response = client.get(url, headers=headers, timeout=timeout)
+        # Ошибки httpx приводятся к requests, чтобы логика повторов осталась общей
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return TransportResponse(response.status_code, response.text, response.headers, url)
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients = {}
+
+
+def create_transport(config):
+    """HTTP/2 через httpx, если он включен и установлен, иначе requests"""
+    settings = config['scout'].get('parser_settings', {}).get('transport', {})
+    if settings.get('http2', False):
+        if HTTP2_AVAILABLE:
+            return HttpxTransport(config)
+        print("⚠️  HTTP/2 отключен: нужен пакет httpx[http2]")
+    return RequestsTransport(config)
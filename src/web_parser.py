@@ -1,51 +1,55 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import time
-import random
-import re
-from urllib.parse import quote, urljoin
+from urllib.parse import quote
 from datetime import datetime
-from fake_useragent import UserAgent
+from .rate_limiter import CrawlScheduler
+from .resilience import RetryPolicy, CircuitBreaker
+from .http_cache import ResponseCache
+from .transport import create_transport, HeaderRotator
+from .html_extractor import HtmlExtractor, EXTRACT_PATHS, init_parse_worker, parse_in_worker
 
 class WebPriceParser:
     def __init__(self, config):
         self.config = config
-        self.session = requests.Session()
-        self.ua = UserAgent()
-        self.update_headers()
-
-    def update_headers(self):
-        """Обновление заголовков"""
-        self.session.headers.update({
-            'User-Agent': self.ua.random,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        self.scheduler = CrawlScheduler(config)
+        self.extractor = HtmlExtractor(config)
+        
+        settings = config['scout'].get('parser_settings', {})
+        self.transport = create_transport(config)
+        self.header_rotator = HeaderRotator(settings.get('transport', {}).get('user_agent_rotate_every', 5))
+        self.retry_policy = RetryPolicy(settings)
+        self.breaker = CircuitBreaker(settings.get('circuit_breaker_threshold', 3))
+        
+        # Кэш страниц поиска на диске
+        cache_settings = settings.get('cache', {})
+        self.cache = None
+        if cache_settings.get('enabled', False):
+            self.cache = ResponseCache(
+                cache_settings.get('dir', 'data/http_cache'),
+                cache_settings.get('ttl_seconds', 3600),
+                cache_settings.get('max_size_mb', 50)
+            )
+        
+        # Журнал запуска (CrawlJournal), если результаты нужно сохранять по ходу обхода
+        self.journal = None
+        
+        # Сколько страниц каждого магазина разобрано каждым способом
+        self.extract_stats = {}
+        self.stats_lock = threading.Lock()
 
     def search_product(self, supplier_name, product_name):
         """Реальный поиск товара в магазине"""
-        supplier_config = self.config['scout']['suppliers'].get(supplier_name)
-        if not supplier_config:
+        html = self.fetch_search_page(supplier_name, product_name)
+        if html is None:
             return None
         
         try:
-            # Кодируем запрос для URL
-            search_query = quote(product_name)
-            search_url = supplier_config['search_url'].format(query=search_query)
-            
-            print(f"🔍 Ищем '{product_name}' в {supplier_name}...")
-            
-            response = self.session.get(
-                search_url, 
-                timeout=self.config['scout']['parser_settings']['timeout']
-            )
-            response.raise_for_status()
-            
             # Парсим результаты
-            products = self.parse_real_search_results(response.text, supplier_config, product_name)
+            products, path = self.extractor.parse_search_page(html, supplier_name, product_name)
+            self.record_extract_path(supplier_name, path)
             
             if products:
                 print(f"   ✅ Найдено {len(products)} товаров")
@@ -55,163 +59,481 @@ class WebPriceParser:
             return products
             
         except Exception as e:
-            print(f"   ❌ Ошибка поиска в {supplier_name}: {e}")
+            print(f"   ❌ Ошибка разбора страницы {supplier_name}: {e}")
             return None
 
-    def parse_real_search_results(self, html, supplier_config, original_query):
-        """Парсинг реальных результатов поиска"""
-        soup = BeautifulSoup(html, 'html.parser')
-        selectors = supplier_config['selectors']
+    def fetch_search_page(self, supplier_name, product_name):
+        """Загрузка страницы поиска товара (None при ошибке)"""
+        supplier_config = self.config['scout']['suppliers'].get(supplier_name)
+        if not supplier_config:
+            return None
         
-        products = []
+        search_url = self.build_search_url(supplier_config, product_name)
+        print(f"🔍 Ищем '{product_name}' в {supplier_name}...")
+        return self.fetch_page(supplier_name, search_url)
+
+    def fetch_page(self, supplier_name, url):
+        """Загрузка страницы магазина с учетом предохранителя (None при ошибке)"""
+        if self.breaker.is_open(supplier_name):
+            return None
         
-        # Ищем товары по селектору карточки товара
-        product_cards = soup.select(selectors['product_card'])
+        try:
+            text = self.fetch(supplier_name, url)
+            self.breaker.record_success(supplier_name)
+            return text
+            
+        except Exception as e:
+            print(f"   ❌ Ошибка поиска в {supplier_name}: {e}")
+            if self.breaker.record_failure(supplier_name):
+                print(f"   🔌 {supplier_name}: {self.breaker.threshold} ошибок подряд, магазин отключен до конца запуска")
+            return None
+
+    def search_bulk(self, supplier_name, materials):
+        """Поиск сразу нескольких материалов по каталогу магазина (пакетный режим)
+
+        Вместо запроса на каждый материал загружаются страницы каталога или
+        ответы JSON-API из настройки bulk, и товары сверяются с материалами
+        на месте. Возвращает {материал: товары}, None - каталог недоступен.
+        """
+        bulk = self.config['scout']['suppliers'][supplier_name]['bulk']
+        urls = bulk.get('urls') or [bulk['url']]
         
-        for card in product_cards[:self.config['scout']['parser_settings']['max_products_per_search']]:
+        products = []
+        loaded = 0
+        for url in urls:
+            if self.breaker.is_open(supplier_name):
+                break
+            if self.url_needs_network(url):
+                self.scheduler.acquire(supplier_name)
+            
+            print(f"📚 Загружаем каталог {supplier_name}: {url}")
+            text = self.fetch_page(supplier_name, url)
+            if text is None:
+                continue
+            loaded += 1
+            
             try:
-                product_data = self.extract_real_product_data(card, selectors, supplier_config['base_url'])
-                if product_data and self.is_relevant_product(product_data['name'], original_query):
-                    products.append(product_data)
+                products.extend(self.extractor.parse_listing(text, supplier_name))
             except Exception as e:
-                continue
+                print(f"   ❌ Ошибка разбора каталога {supplier_name}: {e}")
+        
+        if not loaded:
+            return {material: None for material in materials}
         
-        return products
+        print(f"   ✅ В каталоге {len(products)} товаров, сверяем с {len(materials)} материалами")
+        return self.extractor.match_listing(products, materials, bulk.get('min_share', 0.5))
 
-    def extract_real_product_data(self, product_element, selectors, base_url):
-        """Извлечение реальных данных о товаре"""
-        # Название товара
-        title_element = product_element.select_one(selectors['product_title'])
-        if not title_element:
-            return None
-            
-        product_name = title_element.get_text(strip=True)
+    def process_bulk_results(self, supplier_name, supplier_config, materials, results):
+        """Записи о ценах по результатам пакетного поиска"""
+        records = []
+        for material in materials:
+            record = self.process_search_result(supplier_name, supplier_config, material, results[material])
+            if record:
+                records.append(record)
+        return records
+
+    def build_search_url(self, supplier_config, product_name):
+        """URL страницы поиска товара"""
+        # Кодируем запрос для URL
+        return supplier_config['search_url'].format(query=quote(product_name))
+
+    def needs_network(self, supplier_name, product_name):
+        """Нужен ли сетевой запрос (нет свежей копии в кэше)"""
+        supplier_config = self.config['scout']['suppliers'][supplier_name]
+        return self.url_needs_network(self.build_search_url(supplier_config, product_name))
+
+    def url_needs_network(self, url):
+        return not self.cache or not self.cache.is_fresh(url)
+
+    def fetch(self, supplier_name, url):
+        """Загрузка страницы (через кэш) с повторами при временных ошибках"""
+        settings = self.config['scout'].get('parser_settings', {})
+        retries = 0
         
-        # Цена товара
-        price = self.extract_real_price(product_element, selectors)
-        if not price:
-            return None
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached and cached['fresh']:
+            self.cache.record('hit')
+            return cached['text']
+        
+        conditional_headers = self.cache.get_conditional_headers(cached) if self.cache else {}
+        
+        while True:
+            started = time.monotonic()
+            try:
+                headers = self.header_rotator.get_headers(conditional_headers)
+                response = self.transport.get(url, headers, settings.get('timeout', 15))
+                
+                # Страница не изменилась - берем сохраненную копию
+                if response.status_code == 304 and cached:
+                    self.cache.record('revalidated')
+                    self.cache.revalidate(url)
+                    return cached['text']
+                
+                response.raise_for_status()
+                if self.cache:
+                    self.cache.record('miss')
+                    self.cache.store(url, response.text, response.headers)
+                return response.text
+            except Exception as e:
+                if not self.retry_policy.should_retry(retries, e):
+                    raise
+                retries += 1
+                delay = self.retry_policy.get_delay(retries, e)
+                print(f"   🔁 {supplier_name}: {e}. Повтор {retries}/{self.retry_policy.retry_attempts} через {delay:.1f} с")
+            finally:
+                self.scheduler.record(supplier_name, network_time=time.monotonic() - started)
             
-        # Ссылка на товар
-        link_element = product_element.select_one(selectors['product_link'])
-        if link_element and link_element.get('href'):
-            product_url = link_element.get('href')
-            if not product_url.startswith('http'):
-                product_url = urljoin(base_url, product_url)
+            time.sleep(delay)
+            # Повтор тоже запрос к магазину и расходует токен
+            self.scheduler.acquire(supplier_name)
+
+    def parse_all_prices(self, selected_city=None, plan=None):
+        """Парсинг цен по всем товарам и магазинам с фильтром по городу
+
+        plan - словарь {магазин: [материалы]} от планировщика, если нужно
+        запросить только часть пар (например, устаревшие цены).
+        С журналом пары, уже обработанные прерванным запуском, не запрашиваются
+        повторно: их цены берутся из журнала. Записи - в порядке поступления
+        из iter_prices.
+        """
+        return list(self.iter_prices(selected_city, plan))
+
+    def iter_prices(self, selected_city=None, plan=None):
+        """Поток записей о ценах: каждая запись отдается сразу, как только найдена
+
+        В параллельных режимах порядок записей определяется тем, какой магазин
+        ответил раньше.
+        """
+        yield from self.iter_crawl(self.build_crawl_list(selected_city, plan))
+
+    def iter_crawl(self, suppliers):
+        """Обход списка (магазин, настройки, материалы) в режиме из конфига"""
+        settings = self.config['scout'].get('parser_settings', {})
+        self.scheduler.reset_stats()
+        self.breaker.reset()
+        if self.cache:
+            self.cache.reset_stats()
+        self.extract_stats = {}
+        
+        if self.journal:
+            yield from self.iter_completed(suppliers)
+            suppliers = self.skip_completed(suppliers)
+        
+        if settings.get('async_mode', False):
+            yield from self.iter_prices_async(suppliers)
         else:
-            product_url = ""
+            yield from self.iter_prices_sync(suppliers)
         
-        return {
-            'name': product_name,
-            'price': price,
-            'url': product_url,
-            'date_found': datetime.now()
-        }
+        self.print_run_summary()
 
-    def extract_real_price(self, product_element, selectors):
-        """Извлечение реальной цены"""
-        price_text = ""
-        
-        # Пробуем разные селекторы цены
-        price_selectors = [
-            selectors['product_price'],
-            'span.price',
-            'div.price',
-            'meta[itemprop="price"]',
-            'span[class*="price"]',
-            'div[class*="price"]'
-        ]
-        
-        for selector in price_selectors:
-            price_element = product_element.select_one(selector)
-            if price_element:
-                if price_element.get('content'):  # Для meta тегов
-                    price_text = price_element.get('content')
-                else:
-                    price_text = price_element.get_text(strip=True)
-                if price_text:
-                    break
-        
-        return self.clean_price(price_text)
+    def iter_completed(self, suppliers):
+        """Цены пар, найденные ранее в продолжаемом запуске"""
+        for supplier_name, _, materials in suppliers:
+            for material in materials:
+                record = self.journal.completed.get((supplier_name, material))
+                if record:
+                    yield record
 
-    def clean_price(self, price_text):
-        """Очистка и преобразование цены в число"""
-        if not price_text:
-            return None
+    def skip_completed(self, suppliers):
+        """Список обхода без пар, уже обработанных в продолжаемом запуске"""
+        crawl_list = []
+        for supplier_name, supplier_config, materials in suppliers:
+            materials = [material for material in materials
+                         if not self.journal.is_completed(supplier_name, material)]
+            if materials:
+                crawl_list.append((supplier_name, supplier_config, materials))
+        return crawl_list
+
+    def record_outcome(self, supplier_name, material, status, record=None):
+        """Запись результата пары в журнал запуска"""
+        if self.journal:
+            self.journal.record(supplier_name, material, status, record)
+
+    def iter_prices_sync(self, suppliers):
+        """Последовательный обход магазинов"""
+        for supplier_name, supplier_config, materials in suppliers:
+            print(f"\n🏪 Парсим {supplier_name} ({supplier_config['city']})...")
             
-        # Удаляем всё кроме цифр
-        cleaned = re.sub(r'[^\d]', '', str(price_text))
-        
-        try:
-            return float(cleaned)
-        except ValueError:
-            return None
+            if supplier_config.get('bulk'):
+                results = self.search_bulk(supplier_name, materials)
+                yield from self.process_bulk_results(supplier_name, supplier_config, materials, results)
+                continue
+            
+            for material in materials:
+                if self.breaker.is_open(supplier_name):
+                    print(f"   ⏭️  {supplier_name}: остальные товары пропущены (магазин недоступен)")
+                    break
+                
+                try:
+                    # Ждем слот в ведре токенов этого магазина (свежий кэш сеть не трогает)
+                    if self.needs_network(supplier_name, material):
+                        self.scheduler.acquire(supplier_name)
+                    
+                    products = self.search_product(supplier_name, material)
+                    record = self.process_search_result(supplier_name, supplier_config, material, products)
+                    
+                except Exception as e:
+                    print(f"   💥 {material}: ошибка - {e}")
+                    self.record_outcome(supplier_name, material, 'failed')
+                    continue
+                
+                if record:
+                    yield record
 
-    def is_relevant_product(self, product_name, search_query):
-        """Проверка релевантности товара запросу"""
-        search_words = search_query.lower().split()
-        product_name_lower = product_name.lower()
+    def iter_prices_async(self, suppliers):
+        """Асинхронный обход как обычный генератор
+
+        Цикл событий работает в фоновом потоке и кладет найденные записи в очередь.
+        Если потребитель перестает читать поток, обход отменяется.
+        """
+        settings = self.config['scout'].get('parser_settings', {})
+        records = queue.Queue()
+        state = {}
         
-        # Ключевые слова для исключения
-        exclude_words = ['аксессуар', 'инструмент', 'кисть', 'валик', 'перчатк']
+        async def crawl():
+            state['loop'] = asyncio.get_running_loop()
+            state['task'] = asyncio.current_task()
+            if settings.get('parse_workers', 0) > 0:
+                await self.parse_all_prices_pipeline(suppliers, records.put)
+            else:
+                await self.parse_all_prices_async(suppliers, records.put)
         
-        # Проверяем на исключения
-        if any(exclude in product_name_lower for exclude in exclude_words):
-            return False
+        def run():
+            try:
+                asyncio.run(crawl())
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                state['error'] = e
+            finally:
+                records.put(None)
         
-        # Считаем количество совпадающих слов
-        matches = sum(1 for word in search_words if word in product_name_lower)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                record = records.get()
+                if record is None:
+                    break
+                yield record
+        finally:
+            # Запись уже получена, значит задача обхода запущена
+            if thread.is_alive() and 'task' in state:
+                state['loop'].call_soon_threadsafe(state['task'].cancel)
+            thread.join()
         
-        return matches >= len(search_words) * 0.3  # 30% совпадений достаточно
+        if 'error' in state:
+            raise state['error']
 
-    def parse_all_prices(self, selected_city=None):
-        """Парсинг цен по всем товарам и магазинам с фильтром по городу"""
-        all_prices = []
-        settings = self.config['scout']['parser_settings']
+    async def parse_all_prices_async(self, suppliers, on_record):
+        """Асинхронный парсинг: магазины обходятся параллельно, лимит запросов у каждого домена свой"""
+        settings = self.config['scout'].get('parser_settings', {})
+        semaphore = asyncio.Semaphore(settings.get('max_concurrent_suppliers', 5))
         
-        for supplier_name, supplier_config in self.config['scout']['suppliers'].items():
-            # Фильтр по городу
-            if selected_city and selected_city not in supplier_config['regions']:
-                print(f"⏭️  Пропускаем {supplier_name} (не в {selected_city})")
-                continue
+        print(f"\n⚡ Параллельный парсинг {len(suppliers)} магазинов...")
+        await asyncio.gather(*[
+            self.crawl_supplier_async(supplier_name, supplier_config, materials, semaphore, on_record)
+            for supplier_name, supplier_config, materials in suppliers
+        ])
+
+    async def crawl_supplier_async(self, supplier_name, supplier_config, materials, semaphore, on_record):
+        """Последовательный обход товаров одного магазина"""
+        async with semaphore:
+            print(f"🏪 Парсим {supplier_name} ({supplier_config['city']})...")
             
-            print(f"\n🏪 Парсим {supplier_name} ({supplier_config['city']})...")
+            if supplier_config.get('bulk'):
+                await self.crawl_bulk_async(supplier_name, supplier_config, materials, on_record)
+                return
             
-            for material in self.config['scout']['target_materials']:
+            for material in materials:
+                if self.breaker.is_open(supplier_name):
+                    print(f"   ⏭️  {supplier_name}: остальные товары пропущены (магазин недоступен)")
+                    break
+                
                 try:
-                    products = self.search_product(supplier_name, material)
+                    # Лимит свой у каждого домена, остальные магазины продолжают работу
+                    if self.needs_network(supplier_name, material):
+                        await self.scheduler.acquire_async(supplier_name)
                     
-                    if products:
-                        # Берем товар с минимальной ценой
-                        best_product = min(products, key=lambda x: x['price'])
-                        
-                        all_prices.append({
-                            'material': material,
-                            'supplier': supplier_name,
-                            'price': best_product['price'],
-                            'product_name': best_product['name'],
-                            'url': best_product['url'],
-                            'city': supplier_config['city'],
-                            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                        
-                        print(f"   ✅ {material}: {best_product['price']} руб. - {best_product['name'][:50]}...")
-                    else:
-                        print(f"   ❌ {material}: не найден")
+                    # requests блокирующий, поэтому запрос выполняется в отдельном потоке
+                    products = await asyncio.to_thread(self.search_product, supplier_name, material)
+                    record = self.process_search_result(supplier_name, supplier_config, material, products)
+                    if record:
+                        on_record(record)
                     
-                    # Случайная задержка между запросами
-                    delay = settings['delay_between_requests'] + random.uniform(0.5, 1.5)
-                    time.sleep(delay)
+                except Exception as e:
+                    print(f"   💥 {supplier_name} / {material}: ошибка - {e}")
+                    self.record_outcome(supplier_name, material, 'failed')
+                    continue
+
+    async def crawl_bulk_async(self, supplier_name, supplier_config, materials, on_record):
+        """Пакетный режим магазина: каталог загружается и разбирается в отдельном потоке"""
+        results = await asyncio.to_thread(self.search_bulk, supplier_name, materials)
+        for record in self.process_bulk_results(supplier_name, supplier_config, materials, results):
+            on_record(record)
+
+    async def parse_all_prices_pipeline(self, suppliers, on_record):
+        """Конвейер: загрузка страниц в потоках, разбор HTML в пуле процессов
+
+        Загрузчики кладут страницы в ограниченную очередь. Когда разборщики
+        не успевают, загрузчики ждут свободного места, так что в памяти
+        одновременно держится не больше parse_queue_size страниц.
+        """
+        settings = self.config['scout'].get('parser_settings', {})
+        workers = settings['parse_workers']
+        pages = asyncio.Queue(maxsize=settings.get('parse_queue_size', workers * 2))
+        semaphore = asyncio.Semaphore(settings.get('max_concurrent_suppliers', 5))
+        
+        print(f"\n⚡ Конвейер: {len(suppliers)} магазинов, {workers} процессов разбора...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_parse_worker,
+                                 initargs=(self.config,)) as pool:
+            consumers = [
+                asyncio.create_task(self.parse_pages_worker(pages, pool, on_record))
+                for _ in range(workers)
+            ]
+            await asyncio.gather(*[
+                self.fetch_supplier_pages(supplier_name, supplier_config, materials, pages, semaphore, on_record)
+                for supplier_name, supplier_config, materials in suppliers
+            ])
+            
+            # Сигнал остановки для каждого разборщика
+            for _ in consumers:
+                await pages.put(None)
+            await asyncio.gather(*consumers)
+
+    async def fetch_supplier_pages(self, supplier_name, supplier_config, materials, pages, semaphore, on_record):
+        """Загрузчик конвейера: страницы одного магазина в очередь разбора"""
+        async with semaphore:
+            print(f"🏪 Парсим {supplier_name} ({supplier_config['city']})...")
+            
+            if supplier_config.get('bulk'):
+                await self.crawl_bulk_async(supplier_name, supplier_config, materials, on_record)
+                return
+            
+            for material in materials:
+                if self.breaker.is_open(supplier_name):
+                    print(f"   ⏭️  {supplier_name}: остальные товары пропущены (магазин недоступен)")
+                    break
+                
+                try:
+                    if self.needs_network(supplier_name, material):
+                        await self.scheduler.acquire_async(supplier_name)
                     
-                    # Обновляем User-Agent каждые 5 запросов
-                    if len(all_prices) % 5 == 0:
-                        self.update_headers()
+                    html = await asyncio.to_thread(self.fetch_search_page, supplier_name, material)
+                    if html is None:
+                        self.process_search_result(supplier_name, supplier_config, material, None)
+                        continue
+                    
+                    # Ждет, если очередь заполнена
+                    await pages.put((supplier_name, supplier_config, material, html))
                     
                 except Exception as e:
-                    print(f"   💥 {material}: ошибка - {e}")
+                    print(f"   💥 {supplier_name} / {material}: ошибка - {e}")
+                    self.record_outcome(supplier_name, material, 'failed')
                     continue
+
+    async def parse_pages_worker(self, pages, pool, on_record):
+        """Разборщик конвейера: передает страницы в пул процессов"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            item = await pages.get()
+            if item is None:
+                break
+            
+            supplier_name, supplier_config, material, html = item
+            try:
+                products, path = await loop.run_in_executor(pool, parse_in_worker, supplier_name, html, material)
+                self.record_extract_path(supplier_name, path)
+                record = self.process_search_result(supplier_name, supplier_config, material, products)
+                if record:
+                    on_record(record)
+            except Exception as e:
+                print(f"   💥 {supplier_name} / {material}: ошибка разбора - {e}")
+                self.record_outcome(supplier_name, material, 'failed')
+
+    def record_extract_path(self, supplier_name, path):
+        """Учет способа, которым со страницы извлечены цены"""
+        with self.stats_lock:
+            paths = self.extract_stats.setdefault(supplier_name, {})
+            paths[path] = paths.get(path, 0) + 1
+
+    def print_extract_stats(self):
+        """Способы извлечения цен по магазинам"""
+        if not self.extract_stats:
+            return
+        print("\n🧩 Откуда взяты цены:")
+        for supplier_name, paths in self.extract_stats.items():
+            summary = ', '.join(f"{EXTRACT_PATHS[path]} - {count}" for path, count in paths.items())
+            print(f"   {supplier_name}: {summary}")
+
+    def print_run_summary(self):
+        """Итоги запуска: планировщик, способы извлечения и кэш"""
+        self.scheduler.print_stats()
+        self.print_extract_stats()
+        if self.cache:
+            self.cache.print_stats()
+            self.cache.flush()
+
+    def process_search_result(self, supplier_name, supplier_config, material, products):
+        """Формирование записи о цене по результатам поиска"""
+        if not products:
+            print(f"   ❌ {supplier_name} / {material}: не найден")
+            # None - страницу не удалось загрузить или разобрать
+            self.record_outcome(supplier_name, material, 'failed' if products is None else 'not_found')
+            return None
+        
+        # Берем товар с минимальной ценой
+        best_product = min(products, key=lambda x: x['price'])
         
-        return all_prices
+        print(f"   ✅ {supplier_name} / {material}: {best_product['price']} руб. - {best_product['name'][:50]}...")
+        
+        record = {
+            'material': material,
+            'supplier': supplier_name,
+            'price': best_product['price'],
+            'product_name': best_product['name'],
+            'url': best_product['url'],
+            'city': supplier_config['city'],
+            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self.record_outcome(supplier_name, material, 'found', record)
+        return record
+
+    def get_target_suppliers(self, selected_city=None):
+        """Список магазинов для парсинга с учетом фильтра по городу"""
+        suppliers = []
+        for supplier_name, supplier_config in self.config['scout']['suppliers'].items():
+            # Фильтр по городу
+            if selected_city and selected_city not in supplier_config['regions']:
+                print(f"⏭️  Пропускаем {supplier_name} (не в {selected_city})")
+                continue
+            suppliers.append((supplier_name, supplier_config))
+        return suppliers
+
+    def build_crawl_list(self, selected_city=None, plan=None):
+        """Список (магазин, настройки, материалы) для обхода
+
+        Без плана - в порядке конфига. С планом магазины идут в его порядке:
+        первым тот, у кого самая срочная пара, материалы - по убыванию срочности.
+        """
+        suppliers = self.get_target_suppliers(selected_city)
+        if plan is not None:
+            rank = {supplier_name: index for index, supplier_name in enumerate(plan)}
+            suppliers = sorted(
+                (item for item in suppliers if item[0] in rank),
+                key=lambda item: rank[item[0]]
+            )
+        
+        crawl_list = []
+        for supplier_name, supplier_config in suppliers:
+            if plan is None:
+                materials = self.config['scout']['target_materials']
+            else:
+                materials = plan.get(supplier_name, [])
+            if materials:
+                crawl_list.append((supplier_name, supplier_config, materials))
+        return crawl_list
 
     def get_available_cities(self):
         """Получение списка доступных городов"""